@@ -5,8 +5,10 @@ import gradio as gr
 from src.handlers.canvas_handlers import get_canvas_handlers
 from src.handlers.health import get_health_checker
 from src.models.config import get_config
+from src.services.aws_client import get_bedrock_service
 from src.utils.lambda_helpers import lambda_image_handler
 from src.utils.logger import app_logger
+from src.utils.validation import MAX_IMAGES_PER_REQUEST
 
 app_logger.info("Starting Canvas Demo application")
 
@@ -80,6 +82,10 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
         <p>High-performance image generation</p>
     """, elem_classes="center-markdown")
 
+    # One set of generation settings shared by every tab instead of a copy per tab
+    with gr.Accordion("Advanced Options", open=False):
+        negative_text, width, height, quality, cfg_scale, seed = create_advanced_options()
+
     # Text to Image Tab
     with gr.Tab("Text to Image"):
         with gr.Column():
@@ -87,16 +93,20 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                 Generate an image from a text prompt using the AWS Nova Canvas model.
             """, elem_classes="center-markdown")
 
-            output = gr.Image(label="Generated Image")
-
-            with gr.Accordion("Advanced Options", open=False):
-                txt2img_negative_text, txt2img_width, txt2img_height, txt2img_quality, txt2img_cfg_scale, txt2img_seed = create_advanced_options()
+            txt2img_output = gr.Gallery(label="Generated Images", columns=3, object_fit="contain")
 
             txt2img_prompt = gr.Textbox(
                 label="Prompt",
                 placeholder="Enter a text prompt (1-1024 characters)",
                 max_lines=4
             )
+            number_of_images = gr.Slider(
+                minimum=1,
+                maximum=MAX_IMAGES_PER_REQUEST,
+                step=1,
+                value=1,
+                label="Number of Images"
+            )
             txt2img_error_box = gr.Markdown(visible=False, elem_classes="error-message")
 
             with gr.Row():
@@ -106,8 +116,11 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                 )
                 gr.Button("Generate Image", elem_id="text_to_image_generate_button").click(
                     lambda *a: get_canvas_handlers().text_to_image(*a),
-                    inputs=[txt2img_prompt, txt2img_negative_text, txt2img_height, txt2img_width, txt2img_quality, txt2img_cfg_scale, txt2img_seed],
-                    outputs=[output, txt2img_error_box]
+                    inputs=[
+                        txt2img_prompt, negative_text, height, width, quality, cfg_scale, seed,
+                        number_of_images
+                    ],
+                    outputs=[txt2img_output, txt2img_error_box]
                 )
 
     # Inpainting Tab
@@ -126,9 +139,6 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                     max_lines=1
                 )
 
-            with gr.Accordion("Advanced Options", open=False):
-                inpaint_negative_text, inpaint_width, inpaint_height, inpaint_quality, inpaint_cfg_scale, inpaint_seed = create_advanced_options()
-
             inpaint_error_box = gr.Markdown(visible=False, elem_classes="error-message")
             inpaint_prompt = gr.Textbox(
                 label="Prompt",
@@ -144,7 +154,7 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                 )
                 gr.Button("Generate Image").click(
                     lambda *a: get_canvas_handlers().inpainting(*a),
-                    inputs=[mask_image, mask_prompt, inpaint_prompt, inpaint_negative_text, inpaint_height, inpaint_width, inpaint_quality, inpaint_cfg_scale, inpaint_seed],
+                    inputs=[mask_image, mask_prompt, inpaint_prompt, negative_text, height, width, quality, cfg_scale, seed],
                     outputs=[inpaint_output, inpaint_error_box]
                 )
 
@@ -170,13 +180,12 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                     max_lines=1
                 )
 
-            with gr.Accordion("Advanced Options", open=False):
+            with gr.Accordion("Outpainting Options", open=False):
                 outpainting_mode = gr.Radio(
                     choices=["DEFAULT", "PRECISE"],
                     value="DEFAULT",
                     label="Outpainting Mode"
                 )
-                outpaint_negative_text, outpaint_width, outpaint_height, outpaint_quality, outpaint_cfg_scale, outpaint_seed = create_advanced_options()
 
             outpaint_error_box = gr.Markdown(visible=False, elem_classes="error-message")
             outpaint_prompt = gr.Textbox(
@@ -193,7 +202,7 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                 )
                 gr.Button("Generate Image").click(
                     lambda *a: get_canvas_handlers().outpainting(*a),
-                    inputs=[outpaint_mask_image, outpaint_mask_prompt, outpaint_prompt, outpaint_negative_text, outpainting_mode, outpaint_height, outpaint_width, outpaint_quality, outpaint_cfg_scale, outpaint_seed],
+                    inputs=[outpaint_mask_image, outpaint_mask_prompt, outpaint_prompt, negative_text, outpainting_mode, height, width, quality, cfg_scale, seed],
                     outputs=[outpaint_output, outpaint_error_box]
                 )
 
@@ -222,7 +231,7 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                     outputs=prompt
                 )
 
-            with gr.Accordion("Advanced Options", open=False):
+            with gr.Accordion("Variation Options", open=False):
                 similarity_strength = gr.Slider(
                     minimum=0.2,
                     maximum=1.0,
@@ -230,7 +239,6 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                     value=0.7,
                     label="Similarity Strength"
                 )
-                negative_text, width, height, quality, cfg_scale, seed = create_advanced_options()
 
             error_box = gr.Markdown(visible=False, elem_classes="error-message")
             output = gr.Image(label="Generated Image")
@@ -250,7 +258,7 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
 
             condition_image = gr.Image(type='pil', label="Condition Image")
 
-            with gr.Accordion("Advanced Options", open=False):
+            with gr.Accordion("Conditioning Options", open=False):
                 control_mode = gr.Radio(
                     choices=["CANNY_EDGE", "SEGMENTATION"],
                     value="CANNY_EDGE",
@@ -263,7 +271,6 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
                     value=0.7,
                     label="Control Strength"
                 )
-                negative_text, width, height, quality, cfg_scale, seed = create_advanced_options()
 
             error_box = gr.Markdown(visible=False, elem_classes="error-message")
             prompt = gr.Textbox(
@@ -308,9 +315,6 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
 
             color_picker.change(append_color, inputs=[colors, color_picker], outputs=colors)
 
-            with gr.Accordion("Advanced Options", open=False):
-                negative_text, width, height, quality, cfg_scale, seed = create_advanced_options()
-
             with gr.Accordion("Optional Reference Image", open=False):
                 reference_image = gr.Image(type='pil', label="Reference Image")
 
@@ -365,6 +369,16 @@ with gr.Blocks(title="AWS Nova Canvas", head=error_interceptor_script, css=_app_
             outputs=health_display
         )
 
+        cache_status = gr.Markdown()
+        gr.Button("Clear Cached Results").click(
+            lambda: f"Cleared {get_bedrock_service().clear_response_cache()} cached results",
+            outputs=cache_status
+        )
+
+# Gradio defaults to one concurrent run per event; allow several so preprocessing and
+# Bedrock waits overlap across users (BedrockService still bounds in-flight invokes)
+demo.queue(default_concurrency_limit=8, max_size=32)
+
 app_logger.info("Gradio interface setup completed")
 
 # Application launch logic
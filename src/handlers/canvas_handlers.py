@@ -1,20 +1,24 @@
 """Handlers for all Canvas operations with error-boundary pattern."""
 
 import io
-import json
 import random
+import tempfile
+import time
 import uuid
-from collections.abc import Callable
-from functools import wraps
+from collections.abc import Callable, Mapping, Sequence
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Final
 
 import gradio as gr
+import orjson
 from PIL import Image
 
 from src.services.aws_client import BedrockService, get_bedrock_service
 from src.services.image_processor import (
     create_padded_image,
+    get_encode_executor,
     process_and_encode_image,
     process_composite_to_mask,
 )
@@ -34,18 +38,140 @@ from src.utils.exceptions import (
 from src.utils.logger import app_logger, log_performance
 from src.utils.validation import (
     DEFAULT_COLORS,
+    MAX_VARIATION_IMAGES,
     ValidationError,
     validate_cfg_scale,
     validate_dimensions,
     validate_hex_colors,
+    validate_number_of_images,
     validate_prompt,
     validate_seed,
 )
 
-# Type aliases for Gradio return types
-GradioImageResult = tuple[Image.Image | None, dict[str, Any]]
+# Type aliases for Gradio return types (images are served from temp file paths)
+GradioImageResult = tuple[str | None, dict[str, Any]]
+GradioGalleryResult = tuple[list[str] | None, dict[str, Any]]
+GradioResult = GradioImageResult | GradioGalleryResult
 GradioTextResult = str
 
+# Request member that carries each task's parameters (read-only)
+_TASK_PARAM_KEYS: Final[Mapping[str, str]] = MappingProxyType(
+    {
+        "TEXT_IMAGE": "textToImageParams",
+        "INPAINTING": "inPaintingParams",
+        "OUTPAINTING": "outPaintingParams",
+        "IMAGE_VARIATION": "imageVariationParams",
+        "COLOR_GUIDED_GENERATION": "colorGuidedGenerationParams",
+        "BACKGROUND_REMOVAL": "backgroundRemovalParams",
+    }
+)
+
+# Opening bytes of each task's request body, up to its params value; the task
+# names and keys are fixed identifiers, so they need no JSON escaping
+_TASK_REQUEST_PREFIXES: Final[Mapping[str, bytes]] = MappingProxyType(
+    {
+        task_type: b'{"taskType":"%b","%b":' % (task_type.encode(), params_key.encode())
+        for task_type, params_key in _TASK_PARAM_KEYS.items()
+    }
+)
+
+# imageGenerationConfig has a fixed shape; only the values vary between requests
+_GENERATION_CONFIG_TEMPLATE: Final[bytes] = (
+    b'"imageGenerationConfig":{"numberOfImages":%d,"height":%d,"width":%d,'
+    b'"quality":%b,"cfgScale":%b,"seed":%d}'
+)
+
+
+@lru_cache(maxsize=64, typed=True)
+def _generation_config_json(
+    height: int,
+    width: int,
+    quality: QualityLevel,
+    cfg_scale: float,
+    seed: int,
+    number_of_images: int = 1,
+) -> bytes:
+    """Serialize the imageGenerationConfig member by filling the fixed template.
+
+    String and float values still go through orjson so they are escaped and
+    formatted exactly as a full dumps() would produce them. Users rarely move
+    the sliders between clicks, so the serialized bytes are memoized.
+    """
+    return _GENERATION_CONFIG_TEMPLATE % (
+        number_of_images,
+        height,
+        width,
+        orjson.dumps(quality),
+        orjson.dumps(cfg_scale),
+        seed,
+    )
+
+
+# Instruction sent to Nova Lite by generate_nova_prompt; {concept} is a seeds.json entry
+_PROMPT_TEMPLATE: Final[str] = """\
+Generate a creative image prompt that builds upon this concept: "{concept}"
+
+Requirements:
+- Create a new, expanded prompt without mentioning or repeating the original concept
+- Focus on vivid visual details and artistic elements
+- Keep the prompt under 1000 characters
+- Do not include any meta-instructions or seed references
+- Return only the new prompt text
+
+Response Format:
+[Just the new prompt text, nothing else]
+"""
+
+_RESULT_FILE_PREFIX: Final[str] = "canvas_gen_"
+# Gradio copies each returned file into its own cache as the event completes, so a
+# result file is safe to delete well before this age
+_RESULT_FILE_MAX_AGE: Final[float] = 600.0
+
+
+def _prune_result_files() -> None:
+    """Delete result files old enough that Gradio has already copied them."""
+    cutoff = time.time() - _RESULT_FILE_MAX_AGE
+    for path in Path(tempfile.gettempdir()).glob(f"{_RESULT_FILE_PREFIX}*.png"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass  # Already removed by a concurrent request
+
+
+def _write_result_file(result: bytes) -> str:
+    """Write generated image bytes to a temp PNG that Gradio can serve as-is.
+
+    Image.open only parses the header here, so a corrupt payload is still
+    rejected without paying for a full decode and Gradio re-encoding it.
+    Stale result files are pruned first, so warm containers and local runs do
+    not keep every image ever generated.
+    """
+    with Image.open(io.BytesIO(result)) as image:
+        app_logger.debug("Generated image: %s, mode: %s", image.size, image.mode)
+
+    _prune_result_files()
+    with tempfile.NamedTemporaryFile(
+        prefix=_RESULT_FILE_PREFIX, suffix=".png", delete=False
+    ) as result_file:
+        result_file.write(result)
+    return result_file.name
+
+
+@lru_cache(maxsize=1)
+def _load_seeds() -> tuple[str, ...]:
+    """Load the prompt concepts from seeds.json once per process.
+
+    Raises:
+        ValueError: If the file does not contain a "seeds" list
+    """
+    seeds_path = Path(__file__).resolve().parent.parent.parent / "seeds.json"
+    data = orjson.loads(seeds_path.read_bytes())
+
+    if "seeds" not in data or not isinstance(data["seeds"], list):
+        raise ValueError("Invalid seeds file format")
+    return tuple(data["seeds"])
+
 
 def gradio_handler(operation: str) -> Callable[..., Any]:
     """Error boundary that maps exceptions to Gradio UI responses.
@@ -56,9 +182,9 @@ def gradio_handler(operation: str) -> Callable[..., Any]:
     - Never silently swallows — always returns structured (None, gr.update(...))
     """
 
-    def decorator(func: Callable[..., GradioImageResult]) -> Callable[..., GradioImageResult]:
+    def decorator(func: Callable[..., GradioResult]) -> Callable[..., GradioResult]:
         @wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> GradioImageResult:
+        def wrapper(*args: Any, **kwargs: Any) -> GradioResult:
             request_id = uuid.uuid4().hex[:12]
             app_logger.info(f"Starting {operation}", request_id=request_id)
             from src.handlers.health import get_health_checker
@@ -99,43 +225,25 @@ class CanvasHandlers:
         quality: QualityLevel = "standard",
         cfg_scale: float = 8.0,
         seed: int = 0,
-    ) -> str:
+        number_of_images: int = 1,
+    ) -> bytes:
         """Build standardized request for Bedrock."""
-        param_dict = {
-            "TEXT_IMAGE": "textToImageParams",
-            "INPAINTING": "inPaintingParams",
-            "OUTPAINTING": "outPaintingParams",
-            "IMAGE_VARIATION": "imageVariationParams",
-            "COLOR_GUIDED_GENERATION": "colorGuidedGenerationParams",
-            "BACKGROUND_REMOVAL": "backgroundRemovalParams",
-        }
-
-        if task_type not in param_dict:
+        prefix = _TASK_REQUEST_PREFIXES.get(task_type)
+        if prefix is None:
             raise ValueError(f"Unknown task type: {task_type}")
 
-        request_body = {
-            "taskType": task_type,
-            param_dict[task_type]: params,
-            "imageGenerationConfig": {
-                "numberOfImages": 1,
-                "height": height,
-                "width": width,
-                "quality": quality,
-                "cfgScale": cfg_scale,
-                "seed": seed,
-            },
-        }
-
-        return json.dumps(request_body)
+        return b"%b%b,%b}" % (
+            prefix,
+            orjson.dumps(params),
+            _generation_config_json(height, width, quality, cfg_scale, seed, number_of_images),
+        )
 
     def _process_response(self, result: bytes) -> GradioImageResult:
         """Process Bedrock image bytes and return appropriate Gradio outputs."""
-        app_logger.info(f"Processing image bytes: {len(result)} bytes")
+        app_logger.debug("Processing image bytes: %d bytes", len(result))
 
         try:
-            image = Image.open(io.BytesIO(result))
-            app_logger.info(f"Created PIL Image: {image.size}, mode: {image.mode}")
-            return image, gr.update(value=None, visible=False)
+            return _write_result_file(result), gr.update(value=None, visible=False)
         except Exception as e:
             app_logger.error(f"Failed to process image bytes: {e!s}")
             return None, gr.update(
@@ -143,6 +251,20 @@ class CanvasHandlers:
                 value="Failed to process the generated image. Please try again.",
             )
 
+    def _process_gallery_response(self, results: list[bytes]) -> GradioGalleryResult:
+        """Process a batch of Bedrock image bytes into Gradio gallery outputs."""
+        app_logger.debug("Processing %d generated images", len(results))
+
+        try:
+            paths = [_write_result_file(result) for result in results]
+            return paths, gr.update(value=None, visible=False)
+        except Exception as e:
+            app_logger.error(f"Failed to process image bytes: {e!s}")
+            return None, gr.update(
+                visible=True,
+                value="Failed to process the generated images. Please try again.",
+            )
+
     def _validate_generation_params(
         self,
         height: int,
@@ -155,6 +277,55 @@ class CanvasHandlers:
         validate_seed(seed)
         validate_cfg_scale(cfg_scale)
 
+    @staticmethod
+    def _validate_mask_inputs(mask_image: GradioImageMask, mask_prompt: str | None) -> str:
+        """
+        Check that a mask prompt or a drawn mask is available, before any encoding.
+
+        Args:
+            mask_image: Gradio ImageMask value that includes a background
+            mask_prompt: Optional text description of the region to edit
+
+        Returns:
+            Stripped mask prompt, or "" when the drawn mask should be used
+
+        Raises:
+            ValidationError: If neither a mask prompt nor a drawn mask is provided
+        """
+        mask_prompt = (mask_prompt or "").strip()
+        if not mask_prompt and "composite" not in mask_image:
+            raise ValidationError("Please provide either a mask prompt or draw a mask on the image")
+        return mask_prompt
+
+    @staticmethod
+    def _drawn_mask(mask_image: GradioImageMask) -> Image.Image:
+        """
+        Build the edit mask from the drawn composite, before the source is encoded.
+
+        Args:
+            mask_image: Gradio ImageMask value that includes a background and composite
+
+        Returns:
+            Black-on-white mask of the drawn regions
+
+        Raises:
+            ValidationError: If nothing was drawn, so the mask would be all white
+        """
+        background = mask_image["background"]
+        composite = mask_image["composite"]
+        if composite is not background:
+            mask = process_composite_to_mask(background, composite)
+            if mask.histogram()[0]:
+                return mask
+        raise ValidationError("Please draw a mask on the image or provide a mask prompt")
+
+    @staticmethod
+    def _add_optional_text(params: dict[str, Any], **fields: str | None) -> None:
+        """Set each text field on params, stripped, skipping ones that are None or blank."""
+        for key, value in fields.items():
+            if value and (stripped := value.strip()):
+                params[key] = stripped
+
     @log_performance
     @gradio_handler("Text-to-image")
     def text_to_image(
@@ -166,26 +337,34 @@ class CanvasHandlers:
         quality: QualityLevel = "standard",
         cfg_scale: float = 8.0,
         seed: int = 0,
-    ) -> GradioImageResult:
-        """Generate image from text prompt."""
+        number_of_images: int = 1,
+    ) -> GradioGalleryResult:
+        """Generate one or more images from text prompt."""
         app_logger.info("Starting text-to-image generation")
 
         prompt = validate_prompt(prompt)
         self._validate_generation_params(height, width, cfg_scale, seed)
+        number_of_images = validate_number_of_images(int(number_of_images))
 
         text_to_image_params: dict[str, Any] = {
             "text": prompt,
         }
-        if negative_text and negative_text.strip():
-            text_to_image_params["negativeText"] = negative_text.strip()
+        self._add_optional_text(text_to_image_params, negativeText=negative_text)
 
         body = self._build_request(
-            "TEXT_IMAGE", text_to_image_params, height, width, quality, cfg_scale, seed
+            "TEXT_IMAGE",
+            text_to_image_params,
+            height,
+            width,
+            quality,
+            cfg_scale,
+            seed,
+            number_of_images,
         )
 
         self.limiter.check_rate_limit(body)
-        result = self.bedrock.generate_image(body)
-        return self._process_response(result)
+        results = self.bedrock.generate_images(body)
+        return self._process_gallery_response(results)
 
     @log_performance
     @gradio_handler("Inpainting")
@@ -209,31 +388,19 @@ class CanvasHandlers:
         if not mask_image or "background" not in mask_image:
             return None, gr.update(visible=True, value="Please provide a base image")
 
-        image_encoded = process_and_encode_image(mask_image["background"])
-
-        mask_image_encoded: str | None = None
-
-        if mask_prompt and mask_prompt.strip():
+        # Mask source is settled before any encode so rejected requests do no image work
+        mask_prompt = self._validate_mask_inputs(mask_image, mask_prompt)
+        in_painting_params: dict[str, Any] = {}
+        if mask_prompt:
             app_logger.debug("Using mask prompt for inpainting")
-        elif mask_image and isinstance(mask_image, dict) and "composite" in mask_image:
-            app_logger.debug("Processing composite mask for inpainting")
-            mask = process_composite_to_mask(mask_image["background"], mask_image["composite"])
-            mask_image_encoded = process_and_encode_image(mask)
+            in_painting_params["maskPrompt"] = mask_prompt
         else:
-            return None, gr.update(
-                visible=True,
-                value="Please provide either a mask prompt or draw a mask on the image",
-            )
+            app_logger.debug("Processing composite mask for inpainting")
+            mask = self._drawn_mask(mask_image)
+            in_painting_params["maskImage"] = process_and_encode_image(mask)
+        in_painting_params["image"] = process_and_encode_image(mask_image["background"])
 
-        in_painting_params: dict[str, Any] = {"image": image_encoded}
-        if mask_image_encoded:
-            in_painting_params["maskImage"] = mask_image_encoded
-        if mask_prompt and mask_prompt.strip():
-            in_painting_params["maskPrompt"] = mask_prompt.strip()
-        if text and text.strip():
-            in_painting_params["text"] = text.strip()
-        if negative_text and negative_text.strip():
-            in_painting_params["negativeText"] = negative_text.strip()
+        self._add_optional_text(in_painting_params, text=text, negativeText=negative_text)
 
         body = self._build_request(
             "INPAINTING", in_painting_params, height, width, quality, cfg_scale, seed
@@ -266,38 +433,23 @@ class CanvasHandlers:
         if not mask_image or "background" not in mask_image:
             return None, gr.update(visible=True, value="Please provide a base image")
 
-        image_encoded = process_and_encode_image(mask_image["background"])
-
-        mask_image_encoded: str | None = None
-
-        if mask_prompt and mask_prompt.strip():
+        mask_prompt = self._validate_mask_inputs(mask_image, mask_prompt)
+        out_painting_params: dict[str, Any] = {"outPaintingMode": outpainting_mode}
+        if mask_prompt:
             app_logger.debug("Using mask prompt for outpainting")
-        elif mask_image and isinstance(mask_image, dict) and "composite" in mask_image:
+            out_painting_params["image"] = process_and_encode_image(mask_image["background"])
+            out_painting_params["maskPrompt"] = mask_prompt
+        else:
             app_logger.debug("Processing composite mask for outpainting")
-            mask = process_composite_to_mask(mask_image["background"], mask_image["composite"])
+            mask = self._drawn_mask(mask_image)
             image_with_alpha = process_composite_to_mask(
                 mask_image["background"], mask_image["composite"], True
             )
+            out_painting_params["image"] = process_and_encode_image(image_with_alpha)
+            out_painting_params["maskImage"] = process_and_encode_image(mask)
 
-            image_encoded = process_and_encode_image(image_with_alpha)
-            mask_image_encoded = process_and_encode_image(mask)
-        else:
-            return None, gr.update(
-                visible=True,
-                value="Please provide either a mask prompt or draw a mask on the image",
-            )
-
-        out_painting_params: dict[str, Any] = {
-            "image": image_encoded,
-            "outPaintingMode": outpainting_mode,
-        }
-        if mask_image_encoded:
-            out_painting_params["maskImage"] = mask_image_encoded
-        if mask_prompt and mask_prompt.strip():
-            out_painting_params["maskPrompt"] = mask_prompt.strip()
-        out_painting_params["text"] = text.strip() if text and text.strip() else " "
-        if negative_text and negative_text.strip():
-            out_painting_params["negativeText"] = negative_text.strip()
+        out_painting_params["text"] = (text or "").strip() or " "
+        self._add_optional_text(out_painting_params, negativeText=negative_text)
 
         body = self._build_request(
             "OUTPAINTING", out_painting_params, height, width, quality, cfg_scale, seed
@@ -339,16 +491,20 @@ class CanvasHandlers:
 
         if not images:
             return None, gr.update(visible=True, value="Please provide at least one input image")
+        if len(images) > MAX_VARIATION_IMAGES:
+            raise ValidationError(
+                f"Maximum {MAX_VARIATION_IMAGES} input images allowed, got {len(images)}"
+            )
 
-        encoded_images = [process_and_encode_image(img) for img in images]
+        if len(images) == 1:
+            encoded_images = [process_and_encode_image(images[0])]
+        else:
+            encoded_images = list(get_encode_executor().map(process_and_encode_image, images))
 
         image_variation_params: dict[str, Any] = {"images": encoded_images}
         if similarity_strength is not None:
             image_variation_params["similarityStrength"] = similarity_strength
-        if text and text.strip():
-            image_variation_params["text"] = text.strip()
-        if negative_text and negative_text.strip():
-            image_variation_params["negativeText"] = negative_text.strip()
+        self._add_optional_text(image_variation_params, text=text, negativeText=negative_text)
 
         body = self._build_request(
             "IMAGE_VARIATION",
@@ -396,8 +552,7 @@ class CanvasHandlers:
             "controlStrength": control_strength,
             "conditionImage": condition_image_encoded,
         }
-        if negative_text and negative_text.strip():
-            text_to_image_params["negativeText"] = negative_text.strip()
+        self._add_optional_text(text_to_image_params, negativeText=negative_text)
 
         body = self._build_request(
             "TEXT_IMAGE", text_to_image_params, height, width, quality, cfg_scale, seed
@@ -427,22 +582,22 @@ class CanvasHandlers:
         text = validate_prompt(text)
         self._validate_generation_params(height, width, cfg_scale, seed)
 
+        # The shared default palette is immutable, so it is serialized without a copy
+        validated_colors: Sequence[str] = (
+            validate_hex_colors(colors) if colors else None
+        ) or DEFAULT_COLORS
+
         reference_image_encoded: str | None = None
         if reference_image is not None:
             reference_image_encoded = process_and_encode_image(reference_image)
 
-        validated_colors = validate_hex_colors(colors) if colors else []
-        if not validated_colors:
-            validated_colors = DEFAULT_COLORS
-
         color_guided_params: dict[str, Any] = {
             "text": text,
             "colors": validated_colors,
         }
         if reference_image_encoded:
             color_guided_params["referenceImage"] = reference_image_encoded
-        if negative_text and negative_text.strip():
-            color_guided_params["negativeText"] = negative_text.strip()
+        self._add_optional_text(color_guided_params, negativeText=negative_text)
 
         body = self._build_request(
             "COLOR_GUIDED_GENERATION",
@@ -469,7 +624,7 @@ class CanvasHandlers:
 
         input_image_encoded = process_and_encode_image(image)
 
-        body = json.dumps(
+        body = orjson.dumps(
             {
                 "taskType": "BACKGROUND_REMOVAL",
                 "backgroundRemovalParams": {"image": input_image_encoded},
@@ -486,30 +641,10 @@ class CanvasHandlers:
         app_logger.info("Starting prompt generation")
 
         try:
-            seeds_path = Path(__file__).resolve().parent.parent.parent / "seeds.json"
-            with seeds_path.open() as file:
-                data = json.load(file)
-
-            if "seeds" not in data or not isinstance(data["seeds"], list):
-                raise ValueError("Invalid seeds file format")
-
-            random_concept = random.choice(data["seeds"])
-            app_logger.debug(f"Selected concept: {random_concept}")
-
-            prompt = f"""
-            Generate a creative image prompt that builds upon this concept: "{random_concept}"
-
-            Requirements:
-            - Create a new, expanded prompt without mentioning or repeating the original concept
-            - Focus on vivid visual details and artistic elements
-            - Keep the prompt under 1000 characters
-            - Do not include any meta-instructions or seed references
-            - Return only the new prompt text
-
-            Response Format:
-            [Just the new prompt text, nothing else]
-            """
+            random_concept = random.choice(_load_seeds())
+            app_logger.debug("Selected concept: %s", random_concept)
 
+            prompt = _PROMPT_TEMPLATE.format(concept=random_concept)
             messages = [{"role": "user", "content": [{"text": prompt}]}]
             result = self.bedrock.generate_prompt(messages)
 
@@ -3,6 +3,8 @@ import time
 from datetime import UTC, datetime
 from typing import Any
 
+import pybase64
+
 from src.models.config import get_config
 from src.services.aws_client import AWSClientManager
 from src.services.rate_limiter import get_rate_limiter
@@ -142,6 +144,8 @@ class HealthCheck:
             "total_requests": self.request_count,
             "requests_per_second": round(self.request_count / max(uptime_seconds, 1), 4),
             "memory_info": self._get_memory_info(),
+            # pybase64 picks its SIMD kernel (AVX-512 VBMI, AVX2, NEON, ...) at import
+            "base64_backend": pybase64.get_version(),
         }
 
     def _get_memory_info(self) -> dict[str, Any]:
@@ -4,10 +4,12 @@ from dataclasses import dataclass, fields
 from dotenv import load_dotenv
 
 # Fields where None means "caller did not pass a value, read from env"
-_ENV_OVERRIDE_FIELDS = frozenset({"enable_nsfw_check", "rate_limit", "is_lambda", "lambda_port"})
+_ENV_OVERRIDE_FIELDS = frozenset(
+    {"enable_nsfw_check", "rate_limit", "bedrock_max_concurrency", "is_lambda", "lambda_port"}
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class AppConfig:
     # AWS Configuration - Use non-reserved names for Lambda
     aws_access_key_id: str = ""
@@ -20,6 +22,7 @@ class AppConfig:
     nova_canvas_model: str = "amazon.nova-canvas-v1:0"
     nova_lite_model: str = "us.amazon.nova-lite-v1:0"
     bedrock_timeout: int = 300
+    bedrock_max_concurrency: int = 5
 
     # Application Settings
     log_level: str = ""
@@ -49,7 +52,8 @@ class AppConfig:
     _explicit_fields: frozenset[str] | None = None
 
     def __init_subclass__(cls, **kwargs: object) -> None:
-        super().__init_subclass__(**kwargs)
+        # slots=True rebuilds the class, so zero-argument super() would bind the original
+        super(AppConfig, cls).__init_subclass__(**kwargs)
 
     def __init__(self, **kwargs: object) -> None:
         valid_fields = {f.name for f in fields(self) if f.name != "_explicit_fields"}
@@ -103,6 +107,8 @@ class AppConfig:
             self.enable_nsfw_check = os.getenv("ENABLE_NSFW_CHECK", "true").lower() == "true"
         if "rate_limit" not in explicit:
             self.rate_limit = int(os.getenv("RATE_LIMIT", "20"))
+        if "bedrock_max_concurrency" not in explicit:
+            self.bedrock_max_concurrency = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "5"))
 
         if not self.hf_token:
             self.hf_token = os.getenv("HF_TOKEN", "")
@@ -1,15 +1,17 @@
 """AWS client management with thread-safe singleton and async storage."""
 
 import atexit
-import base64
-import json
+import hashlib
 import threading
 import uuid
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 from typing import TYPE_CHECKING, Any, Final, cast
 
 import boto3
+import orjson
+import pybase64
 from botocore.config import Config
 from botocore.exceptions import ClientError
 
@@ -42,7 +44,8 @@ class AWSClientManager:
 
     # Thread pool for async operations
     _executor: ThreadPoolExecutor | None = None
-    MAX_WORKERS: Final[int] = 2
+    # Sized so one response's JSON and images upload in parallel
+    MAX_WORKERS: Final[int] = 4
 
     def __new__(cls) -> "AWSClientManager":
         """Thread-safe singleton creation using double-checked locking."""
@@ -65,9 +68,9 @@ class AWSClientManager:
 
     @classmethod
     def _shutdown_executor(cls) -> None:
-        """Shutdown the thread pool executor on exit."""
+        """Shutdown the thread pool executor on exit, letting queued S3 uploads finish."""
         if cls._executor is not None:
-            cls._executor.shutdown(wait=False)
+            cls._executor.shutdown(wait=True)
             cls._executor = None
 
     @classmethod
@@ -94,9 +97,16 @@ class AWSClientManager:
                             "service_name": "bedrock-runtime",
                             "region_name": "us-east-1",  # Nova Canvas only in us-east-1
                             "config": Config(
+                                # Fail fast on an unreachable endpoint; generation
+                                # time is covered by read_timeout
+                                connect_timeout=5,
                                 read_timeout=get_config().bedrock_timeout,
-                                max_pool_connections=10,
-                                retries={"max_attempts": 3},
+                                max_pool_connections=32,
+                                # Adaptive adds client-side backoff on ThrottlingException
+                                # on top of standard's jittered exponential retries
+                                retries={"max_attempts": 3, "mode": "adaptive"},
+                                # Generations can idle a pooled connection for tens of seconds
+                                tcp_keepalive=True,
                             ),
                         }
                         if get_config().aws_access_key_id:
@@ -124,7 +134,13 @@ class AWSClientManager:
                         s3_kwargs: dict[str, Any] = {
                             "service_name": "s3",
                             "region_name": get_config().bucket_region,
-                            "config": Config(max_pool_connections=5),
+                            "config": Config(
+                                # Room for every upload worker plus the rate limiter's
+                                # GET/PUT from each concurrent Gradio event
+                                max_pool_connections=16,
+                                retries={"max_attempts": 3, "mode": "standard"},
+                                tcp_keepalive=True,
+                            ),
                         }
                         if get_config().aws_access_key_id:
                             s3_kwargs["aws_access_key_id"] = get_config().aws_access_key_id
@@ -165,47 +181,142 @@ class AWSClientManager:
         return self._executor
 
 
+class _ResponseCache:
+    """Thread-safe LRU cache of generated images keyed by a hash of the request body.
+
+    Nova Canvas is deterministic for a fixed seed, so an identical resubmission
+    (double clicks, re-running an unchanged prompt) can reuse the earlier image.
+    Image inputs are embedded as base64 in the body, so the key covers them too.
+    Bounded by entry count and by total image bytes, since one generated PNG
+    is several megabytes.
+    """
+
+    def __init__(self, max_size: int = 64, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self._cache: OrderedDict[bytes, list[bytes]] = OrderedDict()
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_key(request_body: bytes) -> bytes:
+        """Compute cache key from the exact bytes sent to Bedrock."""
+        return hashlib.blake2b(request_body, digest_size=16).digest()
+
+    def get(self, key: bytes) -> list[bytes] | None:
+        with self._lock:
+            images = self._cache.get(key)
+            if images is not None:
+                self._cache.move_to_end(key)
+            return images
+
+    def put(self, key: bytes, images: list[bytes]) -> None:
+        size = sum(map(len, images))
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= sum(map(len, previous))
+            self._cache[key] = images
+            self._total_bytes += size
+            while len(self._cache) > self._max_size or self._total_bytes > self._max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._total_bytes -= sum(map(len, evicted))
+
+    def clear(self) -> int:
+        """Drop all cached images and return how many entries were removed."""
+        with self._lock:
+            removed = len(self._cache)
+            self._cache.clear()
+            self._total_bytes = 0
+            return removed
+
+
 class BedrockService:
     """Service class for AWS Bedrock operations."""
 
     def __init__(self) -> None:
         """Initialize the Bedrock service."""
         self.client_manager = AWSClientManager()
+        self._response_cache = _ResponseCache()
+        # Bounds in-flight invoke_model calls so concurrent users queue here
+        # rather than all hitting Bedrock throttling at once
+        self._invoke_slots = threading.BoundedSemaphore(get_config().bedrock_max_concurrency)
+
+    def clear_response_cache(self) -> int:
+        """
+        Forget cached generations so identical requests call Bedrock again.
+
+        Returns:
+            Number of cached responses removed
+        """
+        removed = self._response_cache.clear()
+        app_logger.info("Cleared %d cached image responses", removed)
+        return removed
+
+    def generate_image(self, request_body: bytes | str) -> bytes:
+        """
+        Generate a single image using Bedrock Nova Canvas model.
+
+        Args:
+            request_body: JSON document (bytes or str) containing the generation parameters
+
+        Returns:
+            Raw image bytes of the first generated image
+
+        Raises:
+            BedrockError: If image generation fails
+        """
+        return self.generate_images(request_body)[0]
 
     @log_performance
-    def generate_image(self, request_body: str) -> bytes:
+    def generate_images(self, request_body: bytes | str) -> list[bytes]:
         """
-        Generate image using Bedrock Nova Canvas model.
+        Generate one or more images using Bedrock Nova Canvas model.
+
+        Nova Canvas produces every image requested via ``numberOfImages`` in a
+        single invoke_model call, so a batch costs one round trip.
 
         Args:
-            request_body: JSON string containing the generation parameters
+            request_body: JSON document (bytes or str) containing the generation parameters
 
         Returns:
-            Raw image bytes
+            Raw image bytes for each generated image, in response order
 
         Raises:
             BedrockError: If image generation fails
         """
         try:
-            app_logger.info("Calling Bedrock invoke_model for image generation")
-
             body_bytes = (
                 request_body.encode("utf-8") if isinstance(request_body, str) else request_body
             )
 
-            response = self.client_manager.bedrock_client.invoke_model(
-                body=body_bytes,
-                modelId=get_config().nova_canvas_model,
-                accept="application/json",
-                contentType="application/json",
-            )
+            cache_key = self._response_cache.compute_key(body_bytes)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                # Already generated and stored to S3 on the original request
+                app_logger.info("Returning cached images for identical request")
+                return cached
+
+            app_logger.debug("Calling Bedrock invoke_model for image generation")
+
+            with self._invoke_slots:
+                response = self.client_manager.bedrock_client.invoke_model(
+                    body=body_bytes,
+                    modelId=get_config().nova_canvas_model,
+                    accept="application/json",
+                    contentType="application/json",
+                )
 
-            image_data = self._process_image_response(response)
+            images = self._process_image_response(response)
+            # Charged for every image in the batch, so large batches evict (or skip) by size
+            self._response_cache.put(cache_key, images)
 
             # Store response asynchronously (truly non-blocking now)
-            self._store_response_async(request_body, image_data)
+            self._store_response_async(request_body, images)
 
-            return image_data
+            return images
 
         except ClientError as e:
             error_msg = e.response.get("Error", {}).get("Message", str(e))
@@ -247,7 +358,7 @@ class BedrockService:
             app_logger.error(f"Unexpected error in prompt generation: {e!s}")
             raise BedrockError(f"Unexpected error: {e!s}") from e
 
-    def _process_image_response(self, response: "InvokeModelResponseTypeDef") -> bytes:
+    def _process_image_response(self, response: "InvokeModelResponseTypeDef") -> list[bytes]:
         """
         Process Bedrock image response.
 
@@ -255,7 +366,7 @@ class BedrockService:
             response: Raw response from Bedrock API
 
         Returns:
-            Decoded image bytes
+            Decoded bytes for each image in the response
 
         Raises:
             BedrockError: If response format is invalid
@@ -265,28 +376,30 @@ class BedrockService:
             if not response_body_stream:
                 raise BedrockError("Invalid response format: Missing body")
 
-            response_body = json.loads(response_body_stream.read())
-            app_logger.debug(f"Bedrock response keys: {list(response_body.keys())}")
+            response_body = orjson.loads(response_body_stream.read())
+            app_logger.debug("Bedrock response keys: %s", list(response_body))
 
             if (
                 "images" in response_body
                 and isinstance(response_body["images"], list)
                 and len(response_body["images"]) > 0
             ):
-                image_b64 = response_body["images"][0]
-                app_logger.debug(f"Base64 image length: {len(image_b64)} characters")
-
-                # Decode base64 to bytes
-                image_bytes = base64.b64decode(image_b64)
-                app_logger.info(f"Decoded image to {len(image_bytes)} bytes")
+                # Decode base64 to bytes (response comes from Bedrock, skip validation)
+                images = [
+                    pybase64.b64decode(image_b64, validate=False)
+                    for image_b64 in response_body["images"]
+                ]
+                app_logger.debug(
+                    "Decoded %d image(s) to %d bytes", len(images), sum(map(len, images))
+                )
 
-                return image_bytes
+                return images
             elif "error" in response_body:
                 raise BedrockError(f"Generation error: {response_body['error']}")
             else:
                 raise BedrockError("Unexpected response format")
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise BedrockError(f"Error decoding response: {e!s}") from e
         except BedrockError:
             raise
@@ -324,57 +437,91 @@ class BedrockService:
         except Exception as e:
             raise BedrockError(f"Error processing text response: {e!s}") from e
 
-    def _store_response_async(self, request_body: str, image_data: bytes) -> None:
+    def _store_response_async(
+        self, request_body: bytes | str, image_data: bytes | list[bytes]
+    ) -> None:
         """
         Store response to S3 asynchronously using thread pool (truly non-blocking).
 
+        Each object is submitted as its own upload, so the response JSON and every
+        image are put concurrently instead of one after another.
+
         Args:
             request_body: The original request JSON
-            image_data: The generated image bytes
+            image_data: The generated image bytes, or one entry per image
         """
         executor = self.client_manager.executor
-        if executor is not None:
-            executor.submit(self._store_response_sync, request_body, image_data)
-        else:
+        if executor is None:
             # Fallback to sync if executor not available
             self._store_response_sync(request_body, image_data)
+            return
+        for key, body, content_type in self._storage_objects(request_body, image_data):
+            executor.submit(self._put_object, key, body, content_type)
 
-    def _store_response_sync(self, request_body: str, image_data: bytes) -> None:
+    def _store_response_sync(
+        self, request_body: bytes | str, image_data: bytes | list[bytes]
+    ) -> None:
         """
         Synchronous implementation of S3 storage.
 
         Args:
             request_body: The original request JSON
-            image_data: The generated image bytes
+            image_data: The generated image bytes, or one entry per image
         """
-        try:
-            timestamp = datetime.now(tz=UTC).strftime("%Y%m%d_%H%M%S_%f")
-            unique_id = uuid.uuid4().hex[:8]
+        for key, body, content_type in self._storage_objects(request_body, image_data):
+            self._put_object(key, body, content_type)
 
-            # Store response body
-            response_key = f"responses/{timestamp}_{unique_id}_response.json"
-            self.client_manager.s3_client.put_object(
-                Bucket=get_config().nova_image_bucket,
-                Key=response_key,
-                Body=request_body,
-                ContentType="application/json",
-            )
+    @staticmethod
+    def _storage_objects(
+        request_body: bytes | str, image_data: bytes | list[bytes]
+    ) -> list[tuple[str, bytes | str, str]]:
+        """
+        Build the S3 key, body and content type of every object stored for a response.
 
-            # Store image if present
-            if image_data:
-                image_key = f"images/{timestamp}_{unique_id}_image.png"
-                self.client_manager.s3_client.put_object(
-                    Bucket=get_config().nova_image_bucket,
-                    Key=image_key,
-                    Body=image_data,
-                    ContentType="image/png",
-                )
+        Args:
+            request_body: The original request JSON
+            image_data: The generated image bytes, or one entry per image
 
-            app_logger.debug(f"Stored response and image to S3: {timestamp}")
+        Returns:
+            The response JSON first, then each non-empty image; extra batch images
+            get an index suffix
+        """
+        timestamp = datetime.now(tz=UTC).strftime("%Y%m%d_%H%M%S_%f")
+        unique_id = uuid.uuid4().hex[:8]
+
+        objects: list[tuple[str, bytes | str, str]] = [
+            (f"responses/{timestamp}_{unique_id}_response.json", request_body, "application/json")
+        ]
+        images = [image_data] if isinstance(image_data, bytes) else image_data
+        for index, image in enumerate(images):
+            if not image:
+                continue
+            suffix = f"_{index}" if index else ""
+            objects.append(
+                (f"images/{timestamp}_{unique_id}_image{suffix}.png", image, "image/png")
+            )
+        return objects
 
+    def _put_object(self, key: str, body: bytes | str, content_type: str) -> None:
+        """
+        Upload one object to the image bucket.
+
+        Args:
+            key: S3 object key
+            body: Object contents
+            content_type: MIME type stored with the object
+        """
+        try:
+            self.client_manager.s3_client.put_object(
+                Bucket=get_config().nova_image_bucket,
+                Key=key,
+                Body=body,
+                ContentType=content_type,
+            )
+            app_logger.debug("Stored %s to S3", key)
         except Exception as e:
             # Don't fail the main operation if storage fails
-            app_logger.warning(f"Failed to store response to S3: {e!s}")
+            app_logger.warning(f"Failed to store {key} to S3: {e!s}")
 
 
 _bedrock_service: BedrockService | None = None
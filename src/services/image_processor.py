@@ -2,18 +2,25 @@
 
 from __future__ import annotations
 
-import base64
+import atexit
 import hashlib
 import io
-import json
+import os
+import threading
 import time
-import urllib.error
-import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime
 from email.utils import parsedate_to_datetime
-from typing import TYPE_CHECKING, Any
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Final
 
 import numpy as np
+import orjson
+import pic_scale
+import pybase64
+import urllib3
 from PIL import Image
 
 if TYPE_CHECKING:
@@ -22,42 +29,269 @@ if TYPE_CHECKING:
 from src.models.config import get_config
 from src.utils.exceptions import ImageError, NSFWError
 from src.utils.logger import app_logger, log_performance
+from src.utils.validation import MAX_VARIATION_IMAGES
+
+# Anything Image.open accepts, plus an already-open PIL image
+ImageSource = str | os.PathLike[str] | Image.Image | io.IOBase
+
+# One worker per image in the largest multi-image (variation) request
+ENCODE_WORKERS: Final[int] = MAX_VARIATION_IMAGES
+
+_encode_executor: ThreadPoolExecutor | None = None
+_encode_executor_lock = threading.Lock()
+_nsfw_executor: ThreadPoolExecutor | None = None
+_nsfw_executor_lock = threading.Lock()
+
+# Modes pic-scale can resample; process() converts everything else to RGB first, so
+# only direct callers with other modes reach the Pillow path
+_PIC_SCALE_MODES: Final[frozenset[str]] = frozenset({"L", "LA", "RGB", "RGBA"})
+# Modes Image.reduce can box-average as-is; with straight alpha, fully transparent
+# pixels would bleed their hidden color into the edges
+_PRE_REDUCE_MODES: Final[frozenset[str]] = frozenset({"L", "RGB"})
+# Shrinks beyond this ratio are box-reduced to within it before LANCZOS, as thumbnail() does
+_PRE_REDUCE_GAP: Final[float] = 2.0
+
+
+@lru_cache(maxsize=32)
+def _resize_plan(src_size: tuple[int, int], dst_size: tuple[int, int], mode: str) -> Any:
+    """Build a pic-scale LANCZOS plan; filter weights are computed once per shape."""
+    return pic_scale.Plan(src_size, dst_size, pic_scale.Resampling.LANCZOS, mode, workers=0)
+
+
+def _lanczos_resize(image: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Resize with LANCZOS, using pic-scale's SIMD resampler when it supports the mode."""
+    if image.mode in _PIC_SCALE_MODES:
+        if image.mode in _PRE_REDUCE_MODES:
+            factor = int(min(image.width / size[0], image.height / size[1]) / _PRE_REDUCE_GAP)
+            if factor > 1:
+                image = image.reduce(factor)
+        resized: Image.Image = _resize_plan(image.size, size, image.mode).resize(image)
+        return resized
+    # Box-reduce by whole factors first for large shrinks, then LANCZOS the remainder
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    """Get the shared pool used to encode several input images concurrently.
+
+    Pillow's decode, resize and encode release the GIL, so the threads overlap.
+    A single process-wide pool avoids paying thread start-up on every request.
+    """
+    global _encode_executor
+    if _encode_executor is None:
+        with _encode_executor_lock:
+            if _encode_executor is None:
+                _encode_executor = ThreadPoolExecutor(
+                    max_workers=ENCODE_WORKERS, thread_name_prefix="image-encode"
+                )
+                atexit.register(_encode_executor.shutdown, wait=False)
+    return _encode_executor
+
+
+def get_nsfw_executor() -> ThreadPoolExecutor:
+    """Get the pool that runs moderation requests alongside the base64 encode.
+
+    Kept apart from the encode pool: encode workers wait on these requests, so
+    sharing one pool could leave every worker blocked on a queued check.
+    """
+    global _nsfw_executor
+    if _nsfw_executor is None:
+        with _nsfw_executor_lock:
+            if _nsfw_executor is None:
+                _nsfw_executor = ThreadPoolExecutor(
+                    max_workers=ENCODE_WORKERS, thread_name_prefix="nsfw-check"
+                )
+                atexit.register(_nsfw_executor.shutdown, wait=False)
+    return _nsfw_executor
+
+
+def _fit_pixel_budget(size: tuple[int, int], max_pixels: int) -> tuple[int, int]:
+    """Scale ``size`` down to at most ``max_pixels``, keeping aspect ratio and 16-alignment."""
+    width, height = size
+    current_pixels = width * height
+    if current_pixels <= max_pixels:
+        return size
+
+    scale_factor = (max_pixels / current_pixels) ** 0.5
+    return (int(width * scale_factor) // 16) * 16, (int(height * scale_factor) // 16) * 16
+
+
+def _clamp_dimensions(size: tuple[int, int], min_size: int, max_size: int) -> tuple[int, int]:
+    """Clamp ``size`` to [min_size, max_size], align to 16 and cap aspect ratio at 4:1."""
+    width, height = size
+
+    # Clamp dimensions to valid range
+    width = max(min(width, max_size), min_size)
+    height = max(min(height, max_size), min_size)
+
+    # Ensure divisibility by 16
+    width = (width // 16) * 16
+    height = (height // 16) * 16
+
+    # Enforce aspect ratio constraints (1:4 to 4:1)
+    aspect_ratio = max(width / height, height / width)
+    if aspect_ratio > 4:
+        if width > height:
+            height = max(min_size, (width // 4 // 16) * 16)
+        else:
+            width = max(min_size, (height // 4 // 16) * 16)
+
+    return width, height
+
+
+def _compute_final_size(
+    size: tuple[int, int], max_pixels: int, min_size: int, max_size: int
+) -> tuple[int, int]:
+    """Size the image ends up at after the pixel budget and the dimension clamp."""
+    return _clamp_dimensions(_fit_pixel_budget(size, max_pixels), min_size, max_size)
+
+
+_NSFW_JPEG_QUALITY: Final[int] = 75
+_NSFW_CONNECT_TIMEOUT: Final[float] = 5.0
+_NSFW_RETRY_AFTER_DEFAULT: Final[int] = 5
+
+# Keep-alive pool shared by every NSFW check, so repeat checks skip the TCP and TLS
+# handshake; retries stay in check_nsfw's loop, only redirects are followed here
+_NSFW_HTTP: Final = urllib3.PoolManager(
+    maxsize=ENCODE_WORKERS,
+    retries=urllib3.Retry(connect=0, read=0, other=0, redirect=3),
+)
+
+
+def _retry_after_seconds(header: str | None) -> int:
+    """Seconds to wait from a Retry-After header given as delay-seconds or an HTTP-date."""
+    if not header:
+        return _NSFW_RETRY_AFTER_DEFAULT
+    try:
+        return int(header)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(header)
+        return max(0, int((retry_at - datetime.now(UTC)).total_seconds()))
+    except (TypeError, ValueError):
+        return _NSFW_RETRY_AFTER_DEFAULT
+
+
+def _nsfw_payload(image: Image.Image) -> bytes:
+    """JPEG bytes sent to the moderation API (and hashed for its cache).
+
+    The classifier only needs a preview, so a quality-75 JPEG is used: far cheaper
+    to encode than PNG and a fraction of the upload size.
+    """
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=_NSFW_JPEG_QUALITY)
+    return buf.getvalue()
 
 
 class _NSFWCache:
-    """Content-addressable cache for NSFW check results.
+    """Thread-safe content-addressable cache for NSFW check results.
 
     Avoids redundant HuggingFace API calls for previously-checked images.
-    Uses SHA-256 of the PNG-encoded image bytes (the same bytes sent to the
+    Uses SHA-256 of the JPEG preview bytes (the same bytes sent to the
     moderation API) as cache key with FIFO eviction.
     """
 
     def __init__(self, max_size: int = 128) -> None:
         self._cache: dict[str, bool] = {}
         self._max_size = max_size
+        self._lock = threading.Lock()
+
+    def _compute_key(self, image: Image.Image | bytes) -> str:
+        """Compute cache key from the exact preview bytes sent to the moderation API.
 
-    def _compute_key(self, image: Image.Image) -> str:
-        """Compute cache key from the exact PNG bytes sent to the moderation API."""
-        buf = io.BytesIO()
-        image.save(buf, format="PNG")
-        return hashlib.sha256(buf.getvalue()).hexdigest()
+        Callers that already built the payload pass it directly to skip re-encoding.
+        """
+        payload = image if isinstance(image, bytes) else _nsfw_payload(image)
+        return hashlib.sha256(payload).hexdigest()
 
-    def get(self, image: Image.Image) -> bool | None:
-        return self._cache.get(self._compute_key(image))
+    def get(self, image: Image.Image | bytes) -> bool | None:
+        key = self._compute_key(image)
+        with self._lock:
+            return self._cache.get(key)
 
-    def put(self, image: Image.Image, is_nsfw: bool) -> None:
-        if len(self._cache) >= self._max_size:
-            del self._cache[next(iter(self._cache))]
-        self._cache[self._compute_key(image)] = is_nsfw
+    def put(self, image: Image.Image | bytes, is_nsfw: bool) -> None:
+        key = self._compute_key(image)
+        with self._lock:
+            if key not in self._cache and len(self._cache) >= self._max_size:
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = is_nsfw
 
 
 _nsfw_cache = _NSFWCache()
 
 
+class _EncodeCache:
+    """Thread-safe LRU cache of encoded request images keyed by source file.
+
+    Retrying a generation or reusing an upload across tabs sends the same
+    file again; a hit skips the decode, resize, NSFW check and base64 encode.
+    Bounded by entry count and by total encoded size, since a single 4 MP
+    PNG mask can encode to several megabytes.
+    """
+
+    def __init__(self, max_size: int = 64, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_key(image: ImageSource, options: dict[str, Any]) -> bytes | None:
+        """Key a file source on its path, size and mtime; None for images and streams.
+
+        Hashing decoded pixels costs over half as much as processing them, so only
+        sources that can be fingerprinted without being read are cached.
+        """
+        if not isinstance(image, str | os.PathLike):
+            return None
+        try:
+            stat = Path(image).stat()
+        except OSError:
+            return None  # Let the processor raise its usual ImageError
+        fingerprint = (os.fspath(image), stat.st_size, stat.st_mtime_ns, sorted(options.items()))
+        return hashlib.blake2b(repr(fingerprint).encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            encoded = self._cache.get(key)
+            if encoded is not None:
+                self._cache.move_to_end(key)
+            return encoded
+
+    def put(self, key: bytes, encoded: str) -> None:
+        if len(encoded) > self._max_bytes:
+            return
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            self._cache[key] = encoded
+            self._total_bytes += len(encoded)
+            while len(self._cache) > self._max_size or self._total_bytes > self._max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._total_bytes = 0
+
+
+_encode_cache = _EncodeCache()
+
+
 class OptimizedImageProcessor:
     """Optimized image processor with synchronous NSFW checking and efficient operations."""
 
-    def __init__(self, image: str | Image.Image | io.IOBase) -> None:
+    # Source modes that must be sent losslessly: masks (single band) and alpha images
+    LOSSLESS_MODES: Final[frozenset[str]] = frozenset({"1", "L", "LA", "P", "PA", "RGBA"})
+    JPEG_QUALITY: Final[int] = 90
+
+    def __init__(self, image: ImageSource) -> None:
         """
         Initialize the image processor.
 
@@ -68,9 +302,12 @@ class OptimizedImageProcessor:
             ImageError: If image cannot be opened
         """
         self.image = self._open_image(image)
-        app_logger.debug(f"ImageProcessor initialized for image: {self.image.size}")
+        self.lossless = self.image.mode in self.LOSSLESS_MODES
+        # Set by process() when a required NSFW check could not be completed
+        self.nsfw_unverified = False
+        app_logger.debug("ImageProcessor initialized for image: %s", self.image.size)
 
-    def _open_image(self, image: str | Image.Image | io.IOBase | None) -> Image.Image:
+    def _open_image(self, image: ImageSource | None) -> Image.Image:
         """
         Convert input to PIL Image with validation.
 
@@ -89,17 +326,21 @@ class OptimizedImageProcessor:
         try:
             if isinstance(image, Image.Image):
                 return image
-            elif isinstance(image, str):
-                return Image.open(image)
+            elif isinstance(image, str | os.PathLike):
+                # Pillow opens paths itself, with no Python-level read buffer
+                return Image.open(os.fspath(image))
             else:
                 return Image.open(image)
         except Exception as e:
             raise ImageError(f"Failed to open image: {e!s}") from e
 
     @log_performance
-    def check_nsfw(self) -> bool | None:
+    def check_nsfw(self, image_data: bytes | None = None) -> bool | None:
         """Check image for NSFW content via HuggingFace API.
 
+        Args:
+            image_data: Prebuilt moderation payload; built from the image when omitted
+
         Returns:
             True if NSFW detected, False if safe, None if check was skipped or failed.
         """
@@ -110,53 +351,44 @@ class OptimizedImageProcessor:
         timeout = get_config().nsfw_timeout
         max_retries = get_config().nsfw_max_retries
 
-        temp_buffer = io.BytesIO()
-        self.image.save(temp_buffer, format="PNG")
-        image_data = temp_buffer.getvalue()
+        if image_data is None:
+            image_data = _nsfw_payload(self.image)
+
+        headers = {
+            "Authorization": f"Bearer {get_config().hf_token}",
+            "Content-Type": "application/octet-stream",
+        }
 
         for attempt in range(max_retries):
             try:
-                req = urllib.request.Request(
+                response = _NSFW_HTTP.request(
+                    "POST",
                     get_config().nsfw_api_url,
-                    data=image_data,
-                    headers={
-                        "Authorization": f"Bearer {get_config().hf_token}",
-                        "Content-Type": "application/octet-stream",
-                    },
+                    body=image_data,
+                    headers=headers,
+                    timeout=urllib3.Timeout(connect=_NSFW_CONNECT_TIMEOUT, read=timeout),
                 )
-                with urllib.request.urlopen(req, timeout=timeout) as response:
-                    result = json.loads(response.read())
+                if response.status < 400:
+                    result = orjson.loads(response.data)
                     nsfw_score = next(
                         (item["score"] for item in result if item["label"] == "nsfw"), 0
                     )
-                    app_logger.debug(f"NSFW Score: {nsfw_score}")
+                    app_logger.debug("NSFW Score: %s", nsfw_score)
                     return nsfw_score > 0.5
 
-            except urllib.error.HTTPError as e:
-                if e.code == 503 and attempt < max_retries - 1:
-                    header = e.headers.get("Retry-After", None)
-                    retry_after = 5  # default fallback
-                    if header:
-                        try:
-                            # Try parsing as integer (delay-seconds)
-                            retry_after = int(header)
-                        except ValueError:
-                            # Try parsing as HTTP-date
-                            try:
-                                parsed_datetime = parsedate_to_datetime(header)
-                                now = datetime.now(UTC)
-                                seconds = max(0, int((parsed_datetime - now).total_seconds()))
-                                retry_after = seconds
-                            except (TypeError, ValueError):
-                                # Fall back to default if parsing fails
-                                retry_after = 5
+                if response.status == 503 and attempt < max_retries - 1:
+                    retry_after = _retry_after_seconds(response.headers.get("Retry-After"))
                     app_logger.warning(f"NSFW API unavailable, retry in {retry_after}s")
                     time.sleep(retry_after)
                     continue
-                if 400 <= e.code < 500:
-                    app_logger.warning(f"NSFW API client error ({e.code}), not retrying: {e}")
+                if 400 <= response.status < 500:
+                    app_logger.warning(f"NSFW API client error ({response.status}), not retrying")
                     break
-                app_logger.warning(f"NSFW API error: {e}")
+                app_logger.warning(f"NSFW API error: HTTP {response.status}")
+            except orjson.JSONDecodeError as e:
+                app_logger.warning(
+                    f"NSFW API returned invalid JSON (attempt {attempt + 1}/{max_retries}): {e!s}"
+                )
             except Exception as e:
                 app_logger.warning(f"NSFW check error (attempt {attempt + 1}/{max_retries}): {e!s}")
 
@@ -175,88 +407,55 @@ class OptimizedImageProcessor:
             Self for method chaining
         """
         if self.image.mode not in ("RGB", "RGBA"):
-            app_logger.debug(f"Converting from {self.image.mode} to RGB")
+            app_logger.debug("Converting from %s to RGB", self.image.mode)
             self.image = self.image.convert("RGB")
         elif self.image.mode == "RGBA":
-            # More efficient RGBA to RGB conversion
+            # Composite onto white; an RGBA mask is read through its alpha band in place,
+            # avoiding the four band copies split() would allocate
             background = Image.new("RGB", self.image.size, (255, 255, 255))
-            background.paste(self.image, mask=self.image.split()[3])
+            background.paste(self.image, mask=self.image)
             self.image = background
             app_logger.debug("Converted RGBA to RGB")
 
         return self
 
-    @log_performance
-    def _resize_for_pixels(self, max_pixels: int | None = None) -> OptimizedImageProcessor:
-        """
-        Efficient pixel-based resizing.
-
-        Args:
-            max_pixels: Maximum total pixels allowed
+    def _final_size(
+        self,
+        max_pixels: int | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+    ) -> tuple[int, int]:
+        """Size the current image ends up at, with config defaults for unset limits."""
+        return _compute_final_size(
+            self.image.size,
+            max_pixels or get_config().max_pixels,
+            min_size or get_config().min_image_size,
+            max_size or get_config().max_image_size,
+        )
 
-        Returns:
-            Self for method chaining
+    def _draft(self, size: tuple[int, int]) -> OptimizedImageProcessor:
         """
-        max_pixels = max_pixels or get_config().max_pixels
-        current_pixels = self.image.width * self.image.height
-
-        if current_pixels <= max_pixels:
-            return self
-
-        # Calculate new dimensions maintaining aspect ratio
-        scale_factor = (max_pixels / current_pixels) ** 0.5
-
-        new_width = int(self.image.width * scale_factor)
-        new_height = int(self.image.height * scale_factor)
+        Let libjpeg decode at the smallest DCT scale (1/2, 1/4, 1/8) still covering size.
 
-        # Ensure dimensions are divisible by 16
-        new_width = (new_width // 16) * 16
-        new_height = (new_height // 16) * 16
-
-        app_logger.debug(f"Resizing from {self.image.size} to ({new_width}, {new_height})")
-        self.image = self.image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-        return self
-
-    @log_performance
-    def _ensure_dimensions(
-        self, min_size: int | None = None, max_size: int | None = None
-    ) -> OptimizedImageProcessor:
-        """
-        Ensure image meets dimension requirements.
+        Only takes effect before the pixels are loaded and is a no-op for other formats
+        or already-decoded images, so it must run before any conversion.
 
         Args:
-            min_size: Minimum dimension size
-            max_size: Maximum dimension size
+            size: Final size the image will be resampled to
 
         Returns:
             Self for method chaining
         """
-        min_size = min_size or get_config().min_image_size
-        max_size = max_size or get_config().max_image_size
-
-        width, height = self.image.size
-
-        # Clamp dimensions to valid range
-        width = max(min(width, max_size), min_size)
-        height = max(min(height, max_size), min_size)
-
-        # Ensure divisibility by 16
-        width = (width // 16) * 16
-        height = (height // 16) * 16
-
-        # Enforce aspect ratio constraints (1:4 to 4:1)
-        aspect_ratio = max(width / height, height / width)
-        if aspect_ratio > 4:
-            if width > height:
-                height = max(min_size, (width // 4 // 16) * 16)
-            else:
-                width = max(min_size, (height // 4 // 16) * 16)
-
-        if (width, height) != self.image.size:
-            app_logger.debug(f"Adjusting dimensions to ({width}, {height})")
-            self.image = self.image.resize((width, height), Image.Resampling.LANCZOS)
+        if self.image.format == "JPEG" and size != self.image.size:
+            self.image.draft(self.image.mode, size)
+            app_logger.debug("JPEG decode size %s for target %s", self.image.size, size)
+        return self
 
+    def _resize_to(self, size: tuple[int, int]) -> OptimizedImageProcessor:
+        """Resample to ``size`` unless the image already has it."""
+        if size != self.image.size:
+            app_logger.debug("Resizing from %s to %s", self.image.size, size)
+            self.image = _lanczos_resize(self.image, size)
         return self
 
     @log_performance
@@ -264,13 +463,20 @@ class OptimizedImageProcessor:
         """
         Encode image to base64 string.
 
+        Opaque sources are sent as JPEG, which is far cheaper to encode and several
+        times smaller than PNG. Masks and alpha sources stay PNG at a low zlib level.
+
         Returns:
             Base64 encoded image string
         """
         image_bytes = io.BytesIO()
-        self.image.save(image_bytes, format="PNG", optimize=True)
-        encoded_string = base64.b64encode(image_bytes.getvalue()).decode("utf8")
-        app_logger.debug(f"Image encoded (size: {len(encoded_string)} chars)")
+        if self.lossless:
+            self.image.save(image_bytes, format="PNG", compress_level=1)
+        else:
+            self.image.save(image_bytes, format="JPEG", quality=self.JPEG_QUALITY, subsampling=2)
+        # getbuffer() exposes the BytesIO storage without copying it to a bytes object
+        encoded_string = pybase64.b64encode_as_string(image_bytes.getbuffer())
+        app_logger.debug("Image encoded (size: %d chars)", len(encoded_string))
         return encoded_string
 
     @log_performance
@@ -288,24 +494,41 @@ class OptimizedImageProcessor:
         Raises:
             NSFWError: If image is flagged as inappropriate
         """
-        app_logger.info("Starting image processing")
+        app_logger.debug("Starting image processing")
 
-        # Apply transformations
+        # Apply transformations; the final size comes from the source dimensions so a
+        # reduced-scale JPEG decode lands on exactly the same output size
+        final_size = self._final_size(
+            kwargs.get("max_pixels"), kwargs.get("min_size"), kwargs.get("max_size")
+        )
+        self._draft(final_size)
+        # Palette and other modes resample poorly, so only they convert up front; RGBA
+        # is resized first and composited onto white at the final, smaller size
+        if self.image.mode not in ("RGB", "RGBA"):
+            self._convert_color_mode()
+        self._resize_to(final_size)
         self._convert_color_mode()
-        self._resize_for_pixels(kwargs.get("max_pixels"))
-        self._ensure_dimensions(kwargs.get("min_size"), kwargs.get("max_size"))
 
         # NSFW check if enabled, with content-addressable caching
         if check_nsfw and get_config().enable_nsfw_check:
-            cached = _nsfw_cache.get(self.image)
+            # Built once for the cache key and the upload; the worker only sends bytes,
+            # since concurrent save() calls on one PIL image share its encoder state
+            payload = _nsfw_payload(self.image)
+            cached = _nsfw_cache.get(payload)
             if cached is True:
                 raise NSFWError("Image flagged as inappropriate")
             if cached is None:
-                is_nsfw = self.check_nsfw()
+                # Encode while the moderation request is in flight
+                pending = get_nsfw_executor().submit(self.check_nsfw, payload)
+                encoded = self.encode()
+                is_nsfw = pending.result()
                 if is_nsfw is not None:
-                    _nsfw_cache.put(self.image, is_nsfw)
+                    _nsfw_cache.put(payload, is_nsfw)
                 if is_nsfw is True:
                     raise NSFWError("Image flagged as inappropriate")
+                # A failed or skipped check must run again on the next identical upload
+                self.nsfw_unverified = is_nsfw is None
+                return encoded
 
         return self.encode()
 
@@ -343,11 +566,20 @@ def create_padded_image(image_dict: dict[str, Any], padding_percent: int = 100)
     y_offset = (new_height - height) // 2
 
     padded.paste(image, (x_offset, y_offset))
-    app_logger.debug(f"Created padded image: {padded.size}")
+    app_logger.debug("Created padded image: %s", padded.size)
 
     return padded
 
 
+def _rgba_array(image: Image.Image) -> NDArray[np.uint8]:
+    """Read-only RGBA pixel array, skipping the convert copy when already RGBA."""
+    return np.asarray(image if image.mode == "RGBA" else image.convert("RGBA"))
+
+
+_OPAQUE_BLACK: Final = np.array([0, 0, 0, 255], dtype=np.uint8)
+_OPAQUE_WHITE: Final = np.array([255, 255, 255, 255], dtype=np.uint8)
+
+
 def process_composite_to_mask(
     original_image: Image.Image,
     composite_image: Image.Image | None = None,
@@ -364,7 +596,8 @@ def process_composite_to_mask(
     Returns:
         Mask as PIL Image
     """
-    original_array: NDArray[np.uint8] = np.array(original_image.convert("RGBA"))
+    # Read-only arrays are enough; nothing below writes into the source pixels
+    original_array = _rgba_array(original_image)
 
     if transparent:
         # Convert non-white areas to black mask
@@ -374,28 +607,28 @@ def process_composite_to_mask(
             & (original_array[:, :, 2] == 255)
         )
 
-        output_image = Image.new("RGBA", original_image.size, (255, 255, 255, 255))
-        output_array: NDArray[np.uint8] = np.array(output_image)
-        output_array[is_not_white_mask] = [0, 0, 0, 255]
+        # Select opaque black or white per pixel in one pass over a single output array
+        output_array: NDArray[np.uint8] = np.where(
+            is_not_white_mask[:, :, np.newaxis], _OPAQUE_BLACK, _OPAQUE_WHITE
+        )
 
         return Image.fromarray(output_array, mode="RGBA")
 
     if composite_image is None:
         # Create mask from transparent areas
-        mask: NDArray[np.uint8] = np.full(original_array.shape[:2], 0, dtype=np.uint8)
-        transparent_areas = original_array[:, :, 3] == 0
-        mask[transparent_areas] = 255
+        mask: NDArray[np.uint8] = np.where(original_array[:, :, 3] == 0, np.uint8(255), np.uint8(0))
     else:
-        # Create mask from differences between original and composite
-        composite_array: NDArray[np.uint8] = np.array(composite_image.convert("RGBA"))
-        difference = np.any(original_array != composite_array, axis=2)
-        mask = np.full(original_array.shape[:2], 255, dtype=np.uint8)
-        mask[difference] = 0
+        # Create mask from differences between original and composite, comparing
+        # each RGBA pixel as one uint32 instead of four bytes plus a reduction
+        composite_array = _rgba_array(composite_image)
+        original_pixels = original_array.view(np.uint32)[:, :, 0]
+        composite_pixels = composite_array.view(np.uint32)[:, :, 0]
+        mask = np.where(original_pixels == composite_pixels, np.uint8(255), np.uint8(0))
 
     return Image.fromarray(mask, mode="L")
 
 
-def process_and_encode_image(image: str | Image.Image | io.IOBase, **kwargs: Any) -> str:
+def process_and_encode_image(image: ImageSource, **kwargs: Any) -> str:
     """
     Main entry point for image processing.
 
@@ -410,5 +643,15 @@ def process_and_encode_image(image: str | Image.Image | io.IOBase, **kwargs: Any
         ImageError: If image processing fails
         NSFWError: If image is flagged as inappropriate
     """
+    cache_key = _encode_cache.compute_key(image, kwargs)
+    if cache_key is not None:
+        cached = _encode_cache.get(cache_key)
+        if cached is not None:
+            app_logger.debug("Reusing encoded image for identical source")
+            return cached
+
     processor = OptimizedImageProcessor(image)
-    return processor.process(**kwargs)
+    encoded = processor.process(**kwargs)
+    if cache_key is not None and not processor.nsfw_unverified:
+        _encode_cache.put(cache_key, encoded)
+    return encoded
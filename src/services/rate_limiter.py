@@ -1,9 +1,10 @@
 """Rate limiter with S3-backed tracking for distributed environments."""
 
-import json
+import threading
 import time
 from typing import Any, Final
 
+import orjson
 from botocore.exceptions import ClientError
 
 from src.models.config import get_config
@@ -17,8 +18,9 @@ class OptimizedRateLimiter:
     """
     Rate limiter using S3 for distributed tracking.
 
-    Uses simple GET → check → PUT for a 20-req/20-min demo app.
-    Eventual consistency is acceptable at this scale.
+    Uses GET → check → conditional PUT for a 20-req/20-min demo app. The last
+    state seen in S3 is kept with its ETag, so an instance that wrote last can
+    skip the GET and PUT against that ETag directly.
     """
 
     # Configuration constants
@@ -28,6 +30,11 @@ class OptimizedRateLimiter:
     def __init__(self) -> None:
         """Initialize the rate limiter."""
         self.client_manager = AWSClientManager()
+        # Last rate data read from or written to S3, used to reject without a round trip
+        # and, with its ETag, as the base of the next conditional write
+        self._snapshot: RateLimitData | None = None
+        self._snapshot_etag = ""
+        self._snapshot_lock = threading.Lock()
 
         self.rate_limit_message: str = (
             "<div style='text-align: center;'>Rate limit exceeded. "
@@ -37,27 +44,30 @@ class OptimizedRateLimiter:
         )
 
     @log_performance
-    def check_rate_limit(self, request_body: str) -> None:
+    def check_rate_limit(self, request_body: bytes | str) -> None:
         """
         Check if request should be rate limited.
 
         Args:
-            request_body: JSON string containing the request parameters
+            request_body: JSON document (bytes or str) containing the request parameters
 
         Raises:
             RateLimitError: If rate limit is exceeded
         """
         try:
-            body_dict = json.loads(request_body)
-            quality = body_dict.get("imageGenerationConfig", {}).get("quality", "standard")
+            body_dict = orjson.loads(request_body)
+            generation_config = body_dict.get("imageGenerationConfig", {})
+            quality = generation_config.get("quality", "standard")
+            # Each image in a batch counts against the limit
+            count = int(generation_config.get("numberOfImages", 1))
 
-            allowed = self._check_and_increment(quality)
+            allowed = self._check_and_increment(quality, count)
 
             if not allowed:
                 app_logger.warning(f"Rate limit exceeded for {quality} request")
                 raise RateLimitError(self.rate_limit_message)
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             app_logger.error("Invalid JSON in request body for rate limiting")
             raise RateLimitError("Invalid request format") from e
         except RateLimitError:
@@ -68,41 +78,54 @@ class OptimizedRateLimiter:
                 "Request allowed despite rate limit check failure."
             )
 
-    def _check_and_increment(self, quality: str) -> bool:
+    def _check_and_increment(self, quality: str, count: int = 1) -> bool:
         """
         Check rate limit and increment counter with optimistic locking.
 
         Args:
             quality: Request quality level ("standard" or "premium")
+            count: Number of images the request generates
 
         Returns:
             True if request is allowed, False if rate limited
         """
-        cost = 2 if quality == "premium" else 1
+        cost = (2 if quality == "premium" else 1) * count
+        if self._known_over_limit(cost):
+            app_logger.debug("Rate limit already reached locally, skipping S3 check")
+            return False
+
         max_retries = 3
+        # Writing on top of the remembered state is an extra first attempt, so a stale
+        # ETag only costs that PUT and the regular retries still read S3
+        snapshot = self._snapshot_state()
+        attempts = max_retries + (snapshot is not None)
 
-        for attempt in range(max_retries):
+        for attempt in range(attempts):
             try:
-                rate_data, etag = self._get_rate_data()
+                state = snapshot if attempt == 0 else None
+                rate_data, etag = state or self._get_rate_data()
                 current_time = time.time()
                 self._clean_old_entries(rate_data, current_time)
+                if state is None:
+                    self._remember(rate_data, etag)
                 total = self._calculate_total(rate_data)
 
                 if total + cost > get_config().rate_limit:
                     return False
 
-                if quality == "premium":
-                    rate_data["premium"].append(current_time)
-                else:
-                    rate_data["standard"].append(current_time)
+                rate_data["premium" if quality == "premium" else "standard"].extend(
+                    [current_time] * count
+                )
 
                 try:
-                    self._put_rate_data(rate_data, etag)
-                    app_logger.debug(f"Rate check passed: {total + cost}/{get_config().rate_limit}")
+                    self._remember(rate_data, self._put_rate_data(rate_data, etag))
+                    app_logger.debug(
+                        "Rate check passed: %d/%d", total + cost, get_config().rate_limit
+                    )
                     return True
                 except ClientError as e:
                     error_code = e.response.get("Error", {}).get("Code", "")
-                    if error_code == "PreconditionFailed" and attempt < max_retries - 1:
+                    if error_code == "PreconditionFailed" and attempt < attempts - 1:
                         app_logger.debug(
                             f"Rate limit ETag conflict, retrying (attempt {attempt + 1})"
                         )
@@ -111,7 +134,7 @@ class OptimizedRateLimiter:
 
             except ClientError as e:
                 if e.response.get("Error", {}).get("Code") == "NoSuchKey":
-                    if self._try_initialize(quality):
+                    if self._try_initialize(quality, count):
                         return True
                     # Init raced, loop will retry with a normal read
                     continue
@@ -125,6 +148,51 @@ class OptimizedRateLimiter:
         app_logger.warning("Rate limit check exhausted retries, allowing request")
         return True  # Fail open after max retries
 
+    def _remember(self, rate_data: RateLimitData, etag: str = "") -> None:
+        """Keep a copy of the latest rate data seen in S3, with the ETag it was stored at."""
+        with self._snapshot_lock:
+            self._snapshot = {
+                "premium": list(rate_data["premium"]),
+                "standard": list(rate_data["standard"]),
+            }
+            self._snapshot_etag = etag
+
+    def _snapshot_state(self) -> tuple[RateLimitData, str] | None:
+        """
+        Copy of the remembered rate data and its ETag, for a write without a GET.
+
+        Returns:
+            Tuple of (rate limit data dict, ETag string), or None if no ETag is known
+        """
+        with self._snapshot_lock:
+            if self._snapshot is None or not self._snapshot_etag:
+                return None
+            rate_data: RateLimitData = {
+                "premium": list(self._snapshot["premium"]),
+                "standard": list(self._snapshot["standard"]),
+            }
+            return rate_data, self._snapshot_etag
+
+    def _known_over_limit(self, cost: int) -> bool:
+        """
+        Check whether the last S3 snapshot already rules this request out.
+
+        Snapshot entries expire on the same schedule as the ones in S3 and other
+        instances can only add entries, so the pruned snapshot total never exceeds
+        the real one: a request over the limit here is over it in S3 too.
+
+        Args:
+            cost: Weighted cost of the incoming request
+
+        Returns:
+            True if the request can be rejected without reading S3
+        """
+        with self._snapshot_lock:
+            if self._snapshot is None:
+                return False
+            self._clean_old_entries(self._snapshot, time.time())
+            return self._calculate_total(self._snapshot) + cost > get_config().rate_limit
+
     def _get_rate_data(self) -> tuple[RateLimitData, str]:
         """
         Get rate data and ETag from S3.
@@ -141,8 +209,7 @@ class OptimizedRateLimiter:
         )
 
         etag = response.get("ETag", "")
-        body = response["Body"].read().decode("utf-8")
-        rate_data: RateLimitData = json.loads(body)
+        rate_data: RateLimitData = orjson.loads(response["Body"].read())
 
         if "premium" not in rate_data:
             rate_data["premium"] = []
@@ -151,19 +218,20 @@ class OptimizedRateLimiter:
 
         return rate_data, etag
 
-    def _put_rate_data(self, rate_data: RateLimitData, etag: str = "") -> None:
-        """Write rate data to S3 with optimistic locking."""
+    def _put_rate_data(self, rate_data: RateLimitData, etag: str = "") -> str:
+        """Write rate data to S3 with optimistic locking and return the new ETag."""
         kwargs: dict[str, Any] = {
             "Bucket": get_config().nova_image_bucket,
             "Key": self.S3_KEY,
-            "Body": json.dumps(rate_data),
+            "Body": orjson.dumps(rate_data),
             "ContentType": "application/json",
         }
         if etag:
             kwargs["IfMatch"] = etag
-        self.client_manager.s3_client.put_object(**kwargs)
+        response = self.client_manager.s3_client.put_object(**kwargs)
+        return response.get("ETag", "")
 
-    def _try_initialize(self, quality: str) -> bool:
+    def _try_initialize(self, quality: str, count: int = 1) -> bool:
         """
         Try to create the rate data file for the first request.
 
@@ -174,6 +242,7 @@ class OptimizedRateLimiter:
 
         Args:
             quality: Quality level of the first request
+            count: Number of images the first request generates
 
         Returns:
             True if initialized successfully, False if another writer won the race
@@ -182,19 +251,17 @@ class OptimizedRateLimiter:
             "premium": [],
             "standard": [],
         }
-        if quality == "premium":
-            rate_data["premium"].append(time.time())
-        else:
-            rate_data["standard"].append(time.time())
+        rate_data["premium" if quality == "premium" else "standard"].extend([time.time()] * count)
 
         try:
-            self.client_manager.s3_client.put_object(
+            response = self.client_manager.s3_client.put_object(
                 Bucket=get_config().nova_image_bucket,
                 Key=self.S3_KEY,
-                Body=json.dumps(rate_data),
+                Body=orjson.dumps(rate_data),
                 ContentType="application/json",
                 IfNoneMatch="*",
             )
+            self._remember(rate_data, response.get("ETag", ""))
             app_logger.info("Initialized rate limit data in S3")
             return True
         except ClientError as e:
@@ -37,7 +37,7 @@ class LambdaImageHandler:
                         pass
 
             if cleaned_count > 0:
-                app_logger.debug(f"Cleaned up {cleaned_count} old temporary image files")
+                app_logger.debug("Cleaned up %d old temporary image files", cleaned_count)
 
         except Exception as e:
             app_logger.warning(f"Failed to cleanup temp files: {e!s}")
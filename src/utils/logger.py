@@ -5,9 +5,10 @@ import logging
 import os
 import threading
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
 from datetime import UTC, datetime
 from functools import wraps
+from types import MappingProxyType
 from typing import TYPE_CHECKING, Any, ParamSpec, TypeVar
 
 if TYPE_CHECKING:
@@ -22,6 +23,16 @@ class OptimizedLogger:
 
     _stream_lock: threading.Lock = threading.Lock()
     _batch_lock: threading.Lock = threading.Lock()
+    # Resolved once; logging.getLevelNamesMapping() builds a fresh dict on every call
+    _LEVEL_NUMBERS: Mapping[str, int] = MappingProxyType(
+        {
+            "DEBUG": logging.DEBUG,
+            "INFO": logging.INFO,
+            "WARNING": logging.WARNING,
+            "ERROR": logging.ERROR,
+            "CRITICAL": logging.CRITICAL,
+        }
+    )
 
     def __init__(self, log_group: str = "/aws/lambda/canvas-demo") -> None:
         self.logger = logging.getLogger(__name__)
@@ -34,6 +45,10 @@ class OptimizedLogger:
         self.last_flush = time.time()
         self.flush_interval = 30  # seconds
         self._stream_created = False
+        # Threshold for the CloudWatch batch; read from env to avoid triggering config validation
+        self.cloudwatch_level = self._LEVEL_NUMBERS.get(
+            os.environ.get("LOG_LEVEL", "INFO").upper(), logging.INFO
+        )
 
     @staticmethod
     def _is_lambda() -> bool:
@@ -75,20 +90,32 @@ class OptimizedLogger:
             except Exception as e:
                 self.logger.error(f"Failed to create log stream {self.log_stream}: {e}")
 
-    _VALID_LEVELS: frozenset[str] = frozenset({"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"})
+    def log(
+        self,
+        message: str,
+        level: str = "INFO",
+        request_id: str = "",
+        args: tuple[object, ...] = (),
+    ) -> None:
+        """Log message with optional CloudWatch batching.
+
+        ``message % args`` is only formatted once a sink will actually emit the record.
+        """
+        levelno = self._LEVEL_NUMBERS.get(level.upper(), logging.INFO)
+        to_cloudwatch = levelno >= self.cloudwatch_level and self._is_lambda()
+        if not to_cloudwatch and not self.logger.isEnabledFor(levelno):
+            return
 
-    def log(self, message: str, level: str = "INFO", request_id: str = "") -> None:
-        """Log message with optional CloudWatch batching."""
-        if level.upper() not in self._VALID_LEVELS:
-            level = "INFO"
+        if args:
+            message = message % args
         prefix = f"[{request_id}] " if request_id else ""
         timestamp = datetime.now(tz=UTC)
 
         # Always log to standard logger
-        getattr(self.logger, level.lower())(f"{prefix}{message}")
+        self.logger.log(levelno, f"{prefix}{message}")
 
         # Batch CloudWatch logs in Lambda environment
-        if self._is_lambda() and self.cloudwatch_client:
+        if to_cloudwatch and self.cloudwatch_client:
             with self._batch_lock:
                 self.batch_logs.append(
                     {
@@ -127,21 +154,21 @@ class OptimizedLogger:
             except Exception as e:
                 self.logger.error(f"Failed to flush logs to CloudWatch: {e}")
 
-    def debug(self, message: str, request_id: str = "") -> None:
+    def debug(self, message: str, *args: object, request_id: str = "") -> None:
         """Log at DEBUG level."""
-        self.log(message, "DEBUG", request_id=request_id)
+        self.log(message, "DEBUG", request_id=request_id, args=args)
 
-    def info(self, message: str, request_id: str = "") -> None:
+    def info(self, message: str, *args: object, request_id: str = "") -> None:
         """Log at INFO level."""
-        self.log(message, "INFO", request_id=request_id)
+        self.log(message, "INFO", request_id=request_id, args=args)
 
-    def warning(self, message: str, request_id: str = "") -> None:
+    def warning(self, message: str, *args: object, request_id: str = "") -> None:
         """Log at WARNING level."""
-        self.log(message, "WARNING", request_id=request_id)
+        self.log(message, "WARNING", request_id=request_id, args=args)
 
-    def error(self, message: str, request_id: str = "") -> None:
+    def error(self, message: str, *args: object, request_id: str = "") -> None:
         """Log at ERROR level."""
-        self.log(message, "ERROR", request_id=request_id)
+        self.log(message, "ERROR", request_id=request_id, args=args)
 
     def __del__(self) -> None:
         """Ensure logs are flushed on cleanup."""
@@ -156,20 +183,22 @@ app_logger = OptimizedLogger()
 def log_performance(func: Callable[P, R]) -> Callable[P, R]:
     """Decorator to log function performance."""
 
+    # Resolved once at decoration time instead of on every call
+    func_name = f"{func.__module__}.{func.__name__}"
+
     @wraps(func)
     def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-        start_time = time.time()
-        func_name = f"{func.__module__}.{func.__name__}"
+        start_time = time.perf_counter()
 
-        app_logger.debug(f"Starting {func_name}")
+        app_logger.debug("Starting %s", func_name)
         try:
             result = func(*args, **kwargs)
-            duration = time.time() - start_time
-            app_logger.info(f"Completed {func_name} in {duration:.2f}s")
+            duration = time.perf_counter() - start_time
+            app_logger.info("Completed %s in %.2fs", func_name, duration)
             return result
         except Exception as e:
-            duration = time.time() - start_time
-            app_logger.error(f"Failed {func_name} after {duration:.2f}s: {e!s}")
+            duration = time.perf_counter() - start_time
+            app_logger.error("Failed %s after %.2fs: %s", func_name, duration, e)
             raise
 
     return wrapper
@@ -1,6 +1,7 @@
 """Input validation utilities for Canvas Demo application."""
 
 import re
+from functools import lru_cache
 from typing import Final
 
 # Constants
@@ -8,9 +9,11 @@ HEX_COLOR_PATTERN: Final[re.Pattern[str]] = re.compile(r"^#[0-9A-Fa-f]{6}$")
 MAX_PROMPT_LENGTH: Final[int] = 1024
 MIN_PROMPT_LENGTH: Final[int] = 1
 MAX_COLORS: Final[int] = 10
+MAX_VARIATION_IMAGES: Final[int] = 5
+MAX_IMAGES_PER_REQUEST: Final[int] = 5
 
 # Default color palette when none provided
-DEFAULT_COLORS: Final[list[str]] = [
+DEFAULT_COLORS: Final[tuple[str, ...]] = (
     "#FF5733",
     "#33FF57",
     "#3357FF",
@@ -21,7 +24,7 @@ DEFAULT_COLORS: Final[list[str]] = [
     "#33FF8C",
     "#FF3333",
     "#33A1FF",
-]
+)
 
 
 class ValidationError(ValueError):
@@ -66,12 +69,18 @@ def validate_hex_colors(colors_str: str | None, max_colors: int = MAX_COLORS) ->
     if not colors_str or not colors_str.strip():
         return []
 
+    return list(_parse_hex_colors(colors_str, max_colors))
+
+
+@lru_cache(maxsize=32)
+def _parse_hex_colors(colors_str: str, max_colors: int) -> tuple[str, ...]:
+    """Split and validate a color string; the palette is often resubmitted unchanged."""
     colors = [c.strip() for c in colors_str.split(",") if c.strip()]
 
     if len(colors) > max_colors:
         raise ValidationError(f"Maximum {max_colors} colors allowed, got {len(colors)}")
 
-    return [validate_hex_color(c) for c in colors]
+    return tuple(validate_hex_color(c) for c in colors)
 
 
 def validate_prompt(
@@ -189,3 +198,22 @@ def validate_cfg_scale(cfg_scale: float, min_scale: float = 1.0, max_scale: floa
     if cfg_scale < min_scale or cfg_scale > max_scale:
         raise ValidationError(f"CFG scale must be between {min_scale} and {max_scale}")
     return cfg_scale
+
+
+def validate_number_of_images(count: int, max_images: int = MAX_IMAGES_PER_REQUEST) -> int:
+    """
+    Validate the number of images requested in one generation.
+
+    Args:
+        count: Number of images to generate
+        max_images: Maximum images Nova Canvas returns per request
+
+    Returns:
+        Validated image count
+
+    Raises:
+        ValidationError: If count is out of range
+    """
+    if count < 1 or count > max_images:
+        raise ValidationError(f"Number of images must be between 1 and {max_images}")
+    return count
@@ -2,11 +2,14 @@
 
 import base64
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.services.aws_client import AWSClientManager, BedrockService
+from src.services.aws_client import AWSClientManager, BedrockService, _ResponseCache
 from src.utils.exceptions import BedrockError
 
 
@@ -48,6 +51,45 @@ class TestGenerateImage:
         assert result == b"fake-image-data"
         mock_cm.bedrock_client.invoke_model.assert_called_once()
 
+    def test_batch_response_returns_every_image(self, bedrock_service):
+        """generate_images decodes all images returned for numberOfImages > 1."""
+        svc, mock_cm = bedrock_service
+        payloads = [b"image-0", b"image-1", b"image-2"]
+        response_body = json.dumps(
+            {"images": [base64.b64encode(p).decode() for p in payloads]}
+        ).encode()
+
+        mock_cm.bedrock_client.invoke_model.return_value = {
+            "body": MagicMock(read=lambda: response_body),
+        }
+        mock_cm.executor = None
+
+        with patch.object(svc, "_store_response_sync") as mock_store:
+            result = svc.generate_images(b'{"imageGenerationConfig": {"numberOfImages": 3}}')
+
+        assert result == payloads
+        mock_cm.bedrock_client.invoke_model.assert_called_once()
+        assert mock_store.call_args[0][1] == payloads
+
+    def test_batch_counts_every_image_against_cache_budget(self, bedrock_service):
+        """A batch whose images together exceed the byte budget is not cached."""
+        svc, mock_cm = bedrock_service
+        svc._response_cache = _ResponseCache(max_bytes=20)
+        payloads = [b"image-0", b"image-1", b"image-2"]  # 21 bytes in total
+        response_body = json.dumps(
+            {"images": [base64.b64encode(p).decode() for p in payloads]}
+        ).encode()
+        mock_cm.bedrock_client.invoke_model.return_value = {
+            "body": MagicMock(read=lambda: response_body),
+        }
+        mock_cm.executor = None
+
+        with patch.object(svc, "_store_response_sync"):
+            for _ in range(2):
+                svc.generate_images(b'{"imageGenerationConfig": {"numberOfImages": 3}}')
+
+        assert mock_cm.bedrock_client.invoke_model.call_count == 2
+
     def test_client_error_raises_bedrock_error(self, bedrock_service):
         """ClientError from Bedrock raises BedrockError."""
         from botocore.exceptions import ClientError
@@ -61,6 +103,124 @@ class TestGenerateImage:
         with pytest.raises(BedrockError, match="Image generation failed"):
             svc.generate_image('{"taskType": "TEXT_IMAGE"}')
 
+    def test_identical_request_served_from_cache(self, bedrock_service):
+        """Repeating an identical request skips Bedrock and S3 storage."""
+        svc, mock_cm = bedrock_service
+        image_b64 = base64.b64encode(b"fake-image-data").decode()
+        response_body = json.dumps({"images": [image_b64]}).encode()
+
+        mock_cm.bedrock_client.invoke_model.return_value = {
+            "body": MagicMock(read=lambda: response_body),
+        }
+        mock_cm.executor = None
+
+        with patch.object(svc, "_store_response_sync") as mock_store:
+            first = svc.generate_image(b'{"taskType": "TEXT_IMAGE", "seed": 1}')
+            second = svc.generate_image('{"taskType": "TEXT_IMAGE", "seed": 1}')
+            svc.generate_image(b'{"taskType": "TEXT_IMAGE", "seed": 2}')
+
+        assert first == second == b"fake-image-data"
+        assert mock_cm.bedrock_client.invoke_model.call_count == 2
+        assert mock_store.call_count == 2
+
+    def test_failed_generation_is_not_cached(self, bedrock_service):
+        """An error response leaves nothing in the cache."""
+        svc, mock_cm = bedrock_service
+        error_body = json.dumps({"error": "content policy violation"}).encode()
+        mock_cm.bedrock_client.invoke_model.return_value = {
+            "body": MagicMock(read=lambda: error_body),
+        }
+
+        for _ in range(2):
+            with pytest.raises(BedrockError):
+                svc.generate_image(b'{"taskType": "TEXT_IMAGE"}')
+
+        assert mock_cm.bedrock_client.invoke_model.call_count == 2
+
+    def test_invoke_concurrency_is_bounded(self, bedrock_service):
+        """No more than bedrock_max_concurrency invoke_model calls run at once."""
+        svc, mock_cm = bedrock_service
+        svc._invoke_slots = threading.BoundedSemaphore(2)
+        image_b64 = base64.b64encode(b"img").decode()
+        response_body = json.dumps({"images": [image_b64]}).encode()
+        lock = threading.Lock()
+        in_flight = peak = 0
+
+        def slow_invoke(**kwargs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+            return {"body": MagicMock(read=lambda: response_body)}
+
+        mock_cm.bedrock_client.invoke_model.side_effect = slow_invoke
+        mock_cm.executor = None
+
+        with patch.object(svc, "_store_response_sync"):
+            threads = [
+                threading.Thread(target=svc.generate_image, args=(f'{{"seed": {i}}}',))
+                for i in range(6)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert mock_cm.bedrock_client.invoke_model.call_count == 6
+        assert peak == 2
+
+
+class TestResponseCache:
+    """Tests for _ResponseCache."""
+
+    def test_lru_eviction_keeps_recently_used(self):
+        """The least recently used entry is evicted once max_size is exceeded."""
+        cache = _ResponseCache(max_size=2)
+        keys = [cache.compute_key(f"body-{i}".encode()) for i in range(3)]
+        cache.put(keys[0], [b"img-0"])
+        cache.put(keys[1], [b"img-1"])
+        assert cache.get(keys[0]) == [b"img-0"]  # refresh key 0
+        cache.put(keys[2], [b"img-2"])
+
+        assert cache.get(keys[0]) == [b"img-0"]
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) == [b"img-2"]
+
+    def test_evicts_oldest_when_over_byte_budget(self):
+        """Total image bytes stay within max_bytes, dropping least recently used first."""
+        cache = _ResponseCache(max_size=10, max_bytes=10)
+        keys = [cache.compute_key(f"body-{i}".encode()) for i in range(3)]
+        cache.put(keys[0], [b"aaaa"])
+        cache.put(keys[1], [b"bbbb"])
+        assert cache.get(keys[0]) == [b"aaaa"]  # refresh key 0
+        cache.put(keys[2], [b"cccc"])
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == [b"aaaa"]
+        assert cache.get(keys[2]) == [b"cccc"]
+
+    def test_oversized_entry_not_cached(self):
+        """An entry larger than the whole budget is skipped instead of flushing the cache."""
+        cache = _ResponseCache(max_size=10, max_bytes=10)
+        small, big = cache.compute_key(b"small"), cache.compute_key(b"big")
+        cache.put(small, [b"aaaa"])
+        cache.put(big, [b"b" * 11])
+
+        assert cache.get(big) is None
+        assert cache.get(small) == [b"aaaa"]
+
+    def test_clear_drops_entries(self, bedrock_service):
+        """clear_response_cache forces the next identical request back to Bedrock."""
+        svc, _ = bedrock_service
+        key = svc._response_cache.compute_key(b"body")
+        svc._response_cache.put(key, [b"img"])
+
+        assert svc.clear_response_cache() == 1
+        assert svc._response_cache.get(key) is None
+
 
 class TestGeneratePrompt:
     """Tests for BedrockService.generate_prompt."""
@@ -101,16 +261,54 @@ class TestStoreResponse:
     """Tests for async/sync storage methods."""
 
     def test_store_response_async_submits_to_executor(self, bedrock_service):
-        """_store_response_async submits task to executor."""
+        """_store_response_async submits one upload per object to the executor."""
         svc, mock_cm = bedrock_service
         mock_executor = MagicMock()
         mock_cm.executor = mock_executor
 
         svc._store_response_async('{"test": true}', b"image-data")
 
-        mock_executor.submit.assert_called_once_with(
-            svc._store_response_sync, '{"test": true}', b"image-data"
-        )
+        calls = mock_executor.submit.call_args_list
+        assert len(calls) == 2
+        assert all(c.args[0] == svc._put_object for c in calls)
+        assert calls[0].args[2:] == ('{"test": true}', "application/json")
+        assert calls[1].args[2:] == (b"image-data", "image/png")
+        mock_cm.s3_client.put_object.assert_not_called()
+
+    def test_store_response_async_puts_run_concurrently(self, bedrock_service):
+        """With a real pool, the response and image uploads overlap."""
+        svc, mock_cm = bedrock_service
+        barrier = threading.Barrier(2, timeout=5)
+        mock_cm.s3_client.put_object.side_effect = lambda **_: barrier.wait()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            mock_cm.executor = executor
+            svc._store_response_async('{"test": true}', b"image-data")
+
+        # Both puts reached the barrier together, so neither waited on the other
+        assert mock_cm.s3_client.put_object.call_count == 2
+        assert not barrier.broken
+
+    def test_store_response_sync_failure_is_per_object(self, bedrock_service):
+        """A failed response upload does not stop the image from being stored."""
+        svc, mock_cm = bedrock_service
+        mock_cm.s3_client.put_object.side_effect = [RuntimeError("S3 down"), None]
+
+        svc._store_response_sync('{"test": true}', b"image-data")
+
+        assert mock_cm.s3_client.put_object.call_count == 2
+
+    def test_store_response_sync_writes_each_batch_image(self, bedrock_service):
+        """Every image in a batch is stored under its own key."""
+        svc, mock_cm = bedrock_service
+
+        svc._store_response_sync('{"test": true}', [b"image-0", b"image-1"])
+
+        keys = [c.kwargs["Key"] for c in mock_cm.s3_client.put_object.call_args_list]
+        assert len(keys) == 3
+        assert keys[0].startswith("responses/")
+        assert keys[1].endswith("_image.png")
+        assert keys[2].endswith("_image_1.png")
 
     def test_store_response_sync_failure_logs_warning(self, bedrock_service):
         """_store_response_sync failure logs warning but doesn't raise."""
@@ -133,6 +331,29 @@ class TestAWSClientManagerReset:
         assert AWSClientManager._logs_client is None
         assert AWSClientManager._executor is None
 
+    def test_exit_shutdown_waits_for_pending_uploads(self):
+        """The atexit hook drains the executor so background S3 stores are not dropped."""
+        mock_executor = MagicMock()
+        with patch.object(AWSClientManager, "_executor", mock_executor):
+            AWSClientManager._shutdown_executor()
+            assert AWSClientManager._executor is None
+
+        mock_executor.shutdown.assert_called_once_with(wait=True)
+
+    def test_s3_client_pool_fits_concurrent_uploads(self):
+        """The S3 pool is larger than the upload pool so parallel puts never queue."""
+        with (
+            patch("src.services.aws_client.get_config") as mock_get_config,
+            patch("src.services.aws_client.boto3.client") as mock_client,
+        ):
+            mock_get_config.return_value.aws_access_key_id = None
+            _ = AWSClientManager().s3_client
+
+        config = mock_client.call_args.kwargs["config"]
+        assert config.max_pool_connections > AWSClientManager.MAX_WORKERS
+        assert config.retries == {"max_attempts": 3, "mode": "standard"}
+        assert config.tcp_keepalive is True
+
     def test_reset_allows_new_instance(self):
         """After _reset(), creating a new instance works."""
         with patch("src.services.aws_client.get_config"):
@@ -1,14 +1,20 @@
 """Unit tests for CanvasHandlers."""
 
 import io
+import json
 import logging
+import os
+import tempfile
+import time
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 from PIL import Image
 
-from src.handlers.canvas_handlers import CanvasHandlers
+from src.handlers.canvas_handlers import CanvasHandlers, _generation_config_json, _load_seeds
 from src.utils.exceptions import ImageError, NSFWError, RateLimitError
+from src.utils.validation import DEFAULT_COLORS
 
 
 class TestCanvasHandlers:
@@ -24,6 +30,12 @@ class TestCanvasHandlers:
         """Mock OptimizedRateLimiter."""
         return MagicMock()
 
+    @pytest.fixture(autouse=True)
+    def result_dir(self, tmp_path, monkeypatch):
+        """Keep generated result files out of the shared temp directory."""
+        monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+        return tmp_path
+
     @pytest.fixture
     def handlers(self, mock_bedrock, mock_limiter):
         """Create CanvasHandlers with mocked dependencies."""
@@ -39,15 +51,41 @@ class TestCanvasHandlers:
 
     def test_text_to_image_success(self, handlers, mock_bedrock, mock_limiter, img_bytes):
         """Test successful text-to-image generation."""
-        mock_bedrock.generate_image.return_value = img_bytes
+        mock_bedrock.generate_images.return_value = [img_bytes]
 
-        image, update = handlers.text_to_image("a cute sloth")
+        images, update = handlers.text_to_image("a cute sloth")
 
-        assert image is not None
-        assert isinstance(image, Image.Image)
+        assert images is not None
+        assert len(images) == 1
+        with Image.open(images[0]) as generated:
+            assert generated.size == (10, 10)
         assert update["visible"] is False
         mock_limiter.check_rate_limit.assert_called_once()
-        mock_bedrock.generate_image.assert_called_once()
+        mock_bedrock.generate_images.assert_called_once()
+        body = json.loads(mock_bedrock.generate_images.call_args[0][0])
+        assert body["imageGenerationConfig"]["numberOfImages"] == 1
+
+    def test_text_to_image_batch_returns_gallery(self, handlers, mock_bedrock, img_bytes):
+        """A batch request asks Nova for every image in one call."""
+        mock_bedrock.generate_images.return_value = [img_bytes] * 3
+
+        images, update = handlers.text_to_image("a cute sloth", number_of_images=3)
+
+        assert images is not None
+        assert len(images) == 3
+        assert update["visible"] is False
+        mock_bedrock.generate_images.assert_called_once()
+        body = json.loads(mock_bedrock.generate_images.call_args[0][0])
+        assert body["imageGenerationConfig"]["numberOfImages"] == 3
+
+    def test_text_to_image_invalid_number_of_images(self, handlers, mock_bedrock):
+        """Image counts outside 1-5 are rejected before any Bedrock call."""
+        images, update = handlers.text_to_image("a prompt", number_of_images=6)
+
+        assert images is None
+        assert update["visible"] is True
+        assert "Number of images" in update["value"]
+        mock_bedrock.generate_images.assert_not_called()
 
     def test_text_to_image_rate_limit(self, handlers, mock_bedrock, mock_limiter):
         """Test rate limit handling."""
@@ -58,7 +96,7 @@ class TestCanvasHandlers:
         assert image is None
         assert update["visible"] is True
         assert "Too many requests" in update["value"]
-        mock_bedrock.generate_image.assert_not_called()
+        mock_bedrock.generate_images.assert_not_called()
 
     def test_text_to_image_empty_prompt(self, handlers):
         """Test handling of empty prompt via validate_prompt."""
@@ -114,7 +152,7 @@ class TestCanvasHandlers:
         """Test inpainting with image processing error."""
         mask_image = {
             "background": Image.new("RGB", (10, 10)),
-            "composite": Image.new("RGB", (10, 10)),
+            "composite": Image.new("RGB", (10, 10), color="white"),
         }
 
         with patch(
@@ -176,7 +214,8 @@ class TestCanvasHandlers:
                 "src.handlers.canvas_handlers.process_and_encode_image", return_value=long_base64
             ),
             patch(
-                "src.handlers.canvas_handlers.process_composite_to_mask", return_value="mask_path"
+                "src.handlers.canvas_handlers.process_composite_to_mask",
+                return_value=Image.new("L", (10, 10)),
             ),
         ):
             image, update = handlers.outpainting(mask_image=mask_image, outpainting_mode="DEFAULT")
@@ -184,17 +223,73 @@ class TestCanvasHandlers:
             assert image is not None, f"Outpainting failed: {update['value']}"
             assert update["visible"] is False
 
+    def test_outpainting_composite_encodes_each_image_once(self, handlers, mock_bedrock, img_bytes):
+        """Drawn-mask outpainting encodes only the alpha image and the mask."""
+        mock_bedrock.generate_image.return_value = img_bytes
+        mask_image = {"background": "bg_path", "composite": "comp_path"}
+        mask = Image.new("L", (10, 10))
+
+        with (
+            patch(
+                "src.handlers.canvas_handlers.process_and_encode_image", return_value="a" * 201
+            ) as mock_process,
+            patch(
+                "src.handlers.canvas_handlers.process_composite_to_mask",
+                side_effect=[mask, "image_with_alpha"],
+            ),
+        ):
+            handlers.outpainting(mask_image=mask_image)
+
+        assert [c.args[0] for c in mock_process.call_args_list] == ["image_with_alpha", mask]
+
+    @pytest.mark.parametrize("operation", ["inpainting", "outpainting"])
+    def test_blank_drawn_mask_rejected_before_encoding(self, handlers, mock_bedrock, operation):
+        """A composite with nothing drawn is rejected without encoding or calling Bedrock."""
+        background = Image.new("RGB", (10, 10), color="red")
+        mask_image = {"background": background, "composite": background.copy()}
+
+        with patch("src.handlers.canvas_handlers.process_and_encode_image") as mock_process:
+            image, update = getattr(handlers, operation)(mask_image)
+
+        assert image is None
+        assert "Please draw a mask" in update["value"]
+        mock_process.assert_not_called()
+        mock_bedrock.generate_image.assert_not_called()
+
+    def test_unchanged_composite_skips_mask_computation(self, handlers):
+        """The composite being the background itself short-circuits the pixel diff."""
+        background = Image.new("RGB", (10, 10))
+
+        with patch("src.handlers.canvas_handlers.process_composite_to_mask") as mock_mask:
+            _, update = handlers.inpainting({"background": background, "composite": background})
+
+        assert "Please draw a mask" in update["value"]
+        mock_mask.assert_not_called()
+
     def test_generate_nova_prompt(self, handlers, mock_bedrock):
         """Test nova prompt generation."""
         mock_bedrock.generate_prompt.return_value = "A creative prompt"
 
-        with patch("builtins.open", new_callable=MagicMock) as mock_open:
-            mock_file = MagicMock()
-            mock_file.__enter__.return_value = mock_file
-            mock_open.return_value = mock_file
-            with patch("json.load", return_value={"seeds": ["concept1", "concept2"]}):
-                result = handlers.generate_nova_prompt()
-                assert result == "A creative prompt"
+        with patch(
+            "src.handlers.canvas_handlers._load_seeds", return_value=("concept1", "concept2")
+        ):
+            result = handlers.generate_nova_prompt()
+            assert result == "A creative prompt"
+
+        prompt_text = mock_bedrock.generate_prompt.call_args[0][0][0]["content"][0]["text"]
+        assert '"concept1"' in prompt_text or '"concept2"' in prompt_text
+
+    def test_seeds_file_loaded_once(self, handlers, mock_bedrock):
+        """seeds.json is read and parsed on the first prompt request only."""
+        mock_bedrock.generate_prompt.return_value = "A creative prompt"
+        _load_seeds.cache_clear()
+
+        handlers.generate_nova_prompt()
+        handlers.generate_nova_prompt()
+
+        assert _load_seeds.cache_info().misses == 1
+        assert _load_seeds.cache_info().hits == 1
+        assert len(_load_seeds()) > 0
 
     def test_image_conditioning_empty_text(self, handlers):
         """Test image conditioning with empty text via validate_prompt."""
@@ -215,7 +310,7 @@ class TestCanvasHandlers:
 
     def test_gradio_handler_catches_generic_exception(self, handlers, mock_bedrock):
         """Test that gradio_handler catches unexpected exceptions."""
-        mock_bedrock.generate_image.side_effect = RuntimeError("Unexpected")
+        mock_bedrock.generate_images.side_effect = RuntimeError("Unexpected")
 
         image, update = handlers.text_to_image("a prompt")
 
@@ -236,6 +331,30 @@ class TestCanvasHandlers:
             assert image is not None
             assert update["visible"] is False
 
+    def test_image_variation_too_many_images_rejected_before_encoding(self, handlers):
+        """More than five inputs are rejected without encoding any of them."""
+        with patch("src.handlers.canvas_handlers.process_and_encode_image") as mock_process:
+            image, update = handlers.image_variation([f"path{i}.png" for i in range(6)])
+
+        assert image is None
+        assert update["visible"] is True
+        assert "Maximum 5 input images" in update["value"]
+        mock_process.assert_not_called()
+
+    def test_image_variation_preserves_input_order(self, handlers, mock_bedrock, img_bytes):
+        """Concurrently encoded images are sent in the order they were given."""
+        mock_bedrock.generate_image.return_value = img_bytes
+        paths = [f"path{i}.png" for i in range(5)]
+
+        with patch(
+            "src.handlers.canvas_handlers.process_and_encode_image",
+            side_effect=lambda path: f"encoded-{path}",
+        ):
+            handlers.image_variation(paths)
+
+        body = json.loads(mock_bedrock.generate_image.call_args[0][0])
+        assert body["imageVariationParams"]["images"] == [f"encoded-{p}" for p in paths]
+
     def test_inpainting_with_mask_prompt_success(self, handlers, mock_bedrock, img_bytes):
         """Test inpainting using mask_prompt (no composite mask needed)."""
         mock_bedrock.generate_image.return_value = img_bytes
@@ -262,12 +381,13 @@ class TestCanvasHandlers:
 
         with patch(
             "src.handlers.canvas_handlers.process_and_encode_image", return_value=long_base64
-        ):
+        ) as mock_process:
             image, update = handlers.inpainting(mask_image=mask_image)
 
         assert image is None
         assert update["visible"] is True
         assert "mask" in update["value"].lower()
+        mock_process.assert_not_called()
 
     def test_outpainting_with_mask_prompt_success(self, handlers, mock_bedrock, img_bytes):
         """Test outpainting using mask_prompt instead of drawn mask."""
@@ -324,6 +444,28 @@ class TestCanvasHandlers:
             assert image is not None
             assert update["visible"] is False
 
+    def test_color_guided_defaults_palette_when_no_colors(self, handlers, mock_bedrock, img_bytes):
+        """Blank colors fall back to the default palette in the request body."""
+        mock_bedrock.generate_image.return_value = img_bytes
+
+        handlers.color_guided_content(text="a sunset", colors="")
+
+        body = json.loads(mock_bedrock.generate_image.call_args[0][0])
+        assert body["colorGuidedGenerationParams"]["colors"] == list(DEFAULT_COLORS)
+
+    def test_color_guided_invalid_colors_rejected_before_encoding(self, handlers):
+        """Bad colors fail validation without encoding the reference image."""
+        with patch("src.handlers.canvas_handlers.process_and_encode_image") as mock_process:
+            image, update = handlers.color_guided_content(
+                text="a sunset",
+                reference_image=Image.new("RGB", (64, 64)),
+                colors="not-a-color",
+            )
+
+        assert image is None
+        assert "Invalid hex color" in update["value"]
+        mock_process.assert_not_called()
+
     def test_color_guided_with_reference_image(self, handlers, mock_bedrock, img_bytes):
         """Test color-guided generation with reference image."""
         mock_bedrock.generate_image.return_value = img_bytes
@@ -379,6 +521,90 @@ class TestCanvasHandlers:
         with pytest.raises(ValueError, match="Unknown task type"):
             handlers._build_request("INVALID_TASK", {})
 
+    def test_build_request_matches_full_serialization(self, handlers):
+        """Templated body decodes to the same document as serializing the whole dict."""
+        params = {"text": 'a "quoted" prompt', "negativeText": "blur"}
+        body = handlers._build_request("TEXT_IMAGE", params, 768, 1280, "premium", 6.5, 42)
+
+        assert json.loads(body) == {
+            "taskType": "TEXT_IMAGE",
+            "textToImageParams": params,
+            "imageGenerationConfig": {
+                "numberOfImages": 1,
+                "height": 768,
+                "width": 1280,
+                "quality": "premium",
+                "cfgScale": 6.5,
+                "seed": 42,
+            },
+        }
+
+    @pytest.mark.parametrize(
+        ("task_type", "params_key"),
+        [
+            ("TEXT_IMAGE", "textToImageParams"),
+            ("INPAINTING", "inPaintingParams"),
+            ("OUTPAINTING", "outPaintingParams"),
+            ("IMAGE_VARIATION", "imageVariationParams"),
+            ("COLOR_GUIDED_GENERATION", "colorGuidedGenerationParams"),
+            ("BACKGROUND_REMOVAL", "backgroundRemovalParams"),
+        ],
+    )
+    def test_build_request_envelope_per_task(self, handlers, task_type, params_key):
+        """Each task's prefix places its params under the matching key."""
+        body = json.loads(handlers._build_request(task_type, {"image": "x"}))
+
+        assert body["taskType"] == task_type
+        assert body[params_key] == {"image": "x"}
+        assert list(body) == ["taskType", params_key, "imageGenerationConfig"]
+
+    def test_add_optional_text_skips_blank_fields(self, handlers):
+        """Only non-blank text fields are added, and they are stripped."""
+        params = {"text": "base"}
+        handlers._add_optional_text(params, negativeText="  blur ", text=None, other="   ")
+
+        assert params == {"text": "base", "negativeText": "blur"}
+
+    def test_build_request_reuses_generation_config(self, handlers):
+        """Unchanged slider values reuse the serialized imageGenerationConfig."""
+        _generation_config_json.cache_clear()
+        handlers._build_request("TEXT_IMAGE", {"text": "one"}, 512, 512, "standard", 8.0, 7)
+        body = handlers._build_request("INPAINTING", {"text": "two"}, 512, 512, "standard", 8.0, 7)
+
+        assert _generation_config_json.cache_info().hits == 1
+        assert json.loads(body)["imageGenerationConfig"]["seed"] == 7
+
+    def test_process_response_returns_file_with_original_bytes(
+        self, handlers, img_bytes, result_dir
+    ):
+        """Generated bytes are handed to Gradio as a file, without re-encoding."""
+        path, update = handlers._process_response(img_bytes)
+
+        assert Path(path).parent == result_dir
+        assert Path(path).name.startswith("canvas_gen_")
+        assert Path(path).read_bytes() == img_bytes
+        assert update["visible"] is False
+
+    def test_process_response_prunes_stale_result_files(self, handlers, img_bytes, result_dir):
+        """Writing a result deletes earlier results Gradio has long since copied."""
+        stale, recent, unrelated = (
+            result_dir / "canvas_gen_stale.png",
+            result_dir / "canvas_gen_recent.png",
+            result_dir / "other.png",
+        )
+        for path in (stale, recent, unrelated):
+            path.write_bytes(img_bytes)
+        old = time.time() - 3600
+        os.utime(stale, (old, old))
+        os.utime(unrelated, (old, old))
+
+        path, _ = handlers._process_response(img_bytes)
+
+        assert not stale.exists()
+        assert recent.exists()
+        assert unrelated.exists()
+        assert Path(path).exists()
+
     def test_process_response_invalid_bytes_returns_generic_error(self, handlers):
         """Test _process_response with invalid bytes returns generic error, not exception details."""
         image, update = handlers._process_response(b"not a valid image")
@@ -392,7 +618,7 @@ class TestCanvasHandlers:
 
     def test_gradio_handler_generates_request_id(self, handlers, mock_bedrock, img_bytes, caplog):
         """Test that gradio_handler generates a unique request ID in log messages."""
-        mock_bedrock.generate_image.return_value = img_bytes
+        mock_bedrock.generate_images.return_value = [img_bytes]
 
         with caplog.at_level(logging.INFO):
             handlers.text_to_image("a cute sloth")
@@ -410,7 +636,7 @@ class TestCanvasHandlers:
         self, handlers, mock_bedrock, img_bytes, caplog
     ):
         """Test that each handler call gets a different request ID."""
-        mock_bedrock.generate_image.return_value = img_bytes
+        mock_bedrock.generate_images.return_value = [img_bytes]
 
         import re
 
@@ -3,6 +3,8 @@
 import os
 from unittest.mock import patch
 
+import pytest
+
 
 class TestConfigFactory:
     """Tests for get_config() lazy factory and reset_config()."""
@@ -21,6 +23,14 @@ class TestConfigFactory:
         config = get_config()
         assert isinstance(config, AppConfig)
 
+    def test_app_config_rejects_unknown_attributes(self):
+        """Slotted AppConfig raises on misspelled attribute writes instead of ignoring them."""
+        from src.models.config import AppConfig
+
+        config = AppConfig(nova_image_bucket="test-bucket")
+        with pytest.raises(AttributeError):
+            config.rate_limt = 5  # type: ignore[attr-defined]
+
     def test_get_config_is_singleton(self):
         """Calling get_config() twice returns the same object."""
         from src.models.config import get_config, reset_config
@@ -54,6 +64,15 @@ class TestConfigFactory:
             config_b = get_config()
             assert config_b.nova_image_bucket == "bucket-b"
 
+    def test_bedrock_max_concurrency_from_env(self):
+        """BEDROCK_MAX_CONCURRENCY is read from env unless passed explicitly."""
+        from src.models.config import AppConfig, get_config, reset_config
+
+        reset_config()
+        with patch.dict(os.environ, {"BEDROCK_MAX_CONCURRENCY": "3"}):
+            assert get_config().bedrock_max_concurrency == 3
+            assert AppConfig(bedrock_max_concurrency=7).bedrock_max_concurrency == 7
+
     def test_get_config_without_credentials_uses_default_chain(self):
         """get_config() without explicit AWS creds succeeds (uses IAM role/default chain)."""
         from src.models.config import reset_config
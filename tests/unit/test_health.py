@@ -2,6 +2,7 @@
 
 from unittest.mock import MagicMock, PropertyMock, patch
 
+import pybase64
 import pytest
 
 from src.handlers.health import HealthCheck
@@ -57,6 +58,7 @@ class TestHealthCheck:
         assert status["services"]["bedrock"]["status"] == "healthy"
         assert status["services"]["s3"]["status"] == "healthy"
         assert status["services"]["configuration"]["status"] == "healthy"
+        assert status["metrics"]["base64_backend"] == pybase64.get_version()
 
     def test_health_check_unhealthy_services(self, mock_deps):
         """Test degraded status when a service fails."""
@@ -3,15 +3,25 @@
 import base64
 import io
 import json
-import urllib.error
+import threading
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from PIL import Image
 
 from src.services.image_processor import (
+    _NSFW_HTTP,
     OptimizedImageProcessor,
+    _clamp_dimensions,
+    _compute_final_size,
+    _encode_cache,
+    _EncodeCache,
+    _fit_pixel_budget,
+    _lanczos_resize,
+    _nsfw_payload,
     _NSFWCache,
+    _retry_after_seconds,
     create_padded_image,
     process_and_encode_image,
     process_composite_to_mask,
@@ -68,6 +78,30 @@ class TestNSFWCache:
         assert cache.get(img2) is True  # still present
         assert cache.get(img3) is False  # newly added
 
+    def test_concurrent_puts_stay_within_max_size(self):
+        """Threads evicting at the same time neither raise nor overfill the cache."""
+        cache = _NSFWCache(max_size=4)
+        payloads = [bytes([i]) for i in range(64)]
+        barrier = threading.Barrier(8, timeout=5)
+        errors = []
+
+        def fill(offset):
+            barrier.wait()
+            try:
+                for payload in payloads[offset::8]:
+                    cache.put(payload, False)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=fill, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(cache._cache) == 4
+
     def test_identical_images_share_cache_key(self):
         """Test that identical images share the same cache key."""
         cache = _NSFWCache(max_size=10)
@@ -110,6 +144,13 @@ class TestOptimizedImageProcessor:
         proc = OptimizedImageProcessor(str(path))
         assert proc.image.size == (64, 64)
 
+    def test_open_image_from_pathlike(self, tmp_path):
+        """Path objects are opened directly by Pillow."""
+        path = tmp_path / "test.png"
+        Image.new("RGB", (64, 64)).save(path)
+        proc = OptimizedImageProcessor(path)
+        assert proc.image.size == (64, 64)
+
     def test_open_image_from_bytesio(self):
         """BytesIO input is opened correctly."""
         buf = io.BytesIO()
@@ -141,6 +182,7 @@ class TestOptimizedImageProcessor:
         proc = OptimizedImageProcessor(img)
         proc._convert_color_mode()
         assert proc.image.mode == "RGB"
+        assert proc.image.getpixel((0, 0)) == (255, 127, 127)
 
     def test_convert_color_mode_grayscale_to_rgb(self):
         """Grayscale L mode is converted to RGB."""
@@ -149,50 +191,152 @@ class TestOptimizedImageProcessor:
         proc._convert_color_mode()
         assert proc.image.mode == "RGB"
 
-    def test_resize_for_pixels_no_resize_under_limit(self):
-        """Image under pixel limit is not resized."""
-        img = Image.new("RGB", (512, 512))
-        proc = OptimizedImageProcessor(img)
-        proc._resize_for_pixels(max_pixels=512 * 512 + 1)
-        assert proc.image.size == (512, 512)
+    def test_fit_pixel_budget_keeps_size_under_limit(self):
+        """A size under the pixel limit is left unchanged."""
+        assert _fit_pixel_budget((512, 512), 512 * 512 + 1) == (512, 512)
 
-    def test_resize_for_pixels_downscale_large_image(self):
-        """Large image is downscaled to fit pixel limit."""
-        img = Image.new("RGB", (3000, 3000))
-        proc = OptimizedImageProcessor(img)
-        proc._resize_for_pixels(max_pixels=4194304)
-        w, h = proc.image.size
+    def test_fit_pixel_budget_downscales_large_size(self):
+        """A large size is scaled down to fit the pixel limit, aligned to 16."""
+        w, h = _fit_pixel_budget((3000, 3000), 4194304)
         assert w * h <= 4194304
         assert w % 16 == 0
         assert h % 16 == 0
 
-    def test_ensure_dimensions_clamp_too_small(self):
-        """Small image is clamped up to min_size."""
-        img = Image.new("RGB", (100, 100))
+    def test_lanczos_resize_matches_pillow(self):
+        """SIMD resize produces the requested size and stays close to Pillow LANCZOS."""
+        img = Image.linear_gradient("L").resize((512, 384)).convert("RGB")
+        resized = _lanczos_resize(img, (160, 128))
+        reference = img.resize((160, 128), Image.Resampling.LANCZOS)
+        assert resized.size == (160, 128)
+        assert resized.mode == "RGB"
+        diff = max(
+            a - b if a > b else b - a
+            for a, b in zip(resized.tobytes(), reference.tobytes(), strict=True)
+        )
+        assert diff <= 8
+
+    def test_lanczos_resize_falls_back_for_unsupported_mode(self):
+        """Modes pic-scale does not handle are resized by Pillow."""
+        img = Image.new("I", (64, 64), 1000)
+        resized = _lanczos_resize(img, (32, 32))
+        assert resized.size == (32, 32)
+        assert resized.mode == "I"
+
+    def test_in_range_image_is_not_resampled(self):
+        """An in-range RGB image with 16-aligned sides passes through process() untouched."""
+        img = Image.new("RGB", (1024, 768))
         proc = OptimizedImageProcessor(img)
-        proc._ensure_dimensions(min_size=256, max_size=2048)
-        w, h = proc.image.size
+        proc.process(check_nsfw=False, max_pixels=4194304, min_size=256, max_size=2048)
+        assert proc.image is img
+
+    def test_clamp_dimensions_too_small(self):
+        """A small size is clamped up to min_size."""
+        w, h = _clamp_dimensions((100, 100), 256, 2048)
         assert w >= 256
         assert h >= 256
 
-    def test_ensure_dimensions_clamp_too_large(self):
-        """Large image is clamped down to max_size."""
-        img = Image.new("RGB", (3000, 3000))
-        proc = OptimizedImageProcessor(img)
-        proc._ensure_dimensions(min_size=256, max_size=2048)
-        w, h = proc.image.size
+    def test_clamp_dimensions_too_large(self):
+        """A large size is clamped down to max_size."""
+        w, h = _clamp_dimensions((3000, 3000), 256, 2048)
         assert w <= 2048
         assert h <= 2048
 
-    def test_ensure_dimensions_extreme_aspect_ratio(self):
+    def test_clamp_dimensions_extreme_aspect_ratio(self):
         """Extreme aspect ratio (>4:1) is corrected."""
-        img = Image.new("RGB", (2048, 100))
-        proc = OptimizedImageProcessor(img)
-        proc._ensure_dimensions(min_size=256, max_size=2048)
-        w, h = proc.image.size
+        w, h = _clamp_dimensions((2048, 100), 256, 2048)
         aspect = max(w / h, h / w)
         assert aspect <= 4.0
 
+    def test_process_resamples_once(self):
+        """An image hitting both the pixel budget and the clamp is resampled a single time."""
+        proc = OptimizedImageProcessor(Image.new("RGB", (8000, 1000)))
+        with patch(
+            "src.services.image_processor._lanczos_resize", wraps=_lanczos_resize
+        ) as mock_resize:
+            proc.process(check_nsfw=False, max_pixels=4194304, min_size=256, max_size=2048)
+        mock_resize.assert_called_once()
+        assert proc.image.size == _compute_final_size((8000, 1000), 4194304, 256, 2048)
+
+    def test_large_jpeg_is_decoded_at_reduced_scale(self, tmp_path):
+        """A JPEG well over budget is drafted by libjpeg instead of fully decoded."""
+        path = tmp_path / "large.jpg"
+        Image.new("RGB", (2048, 2048), color="red").save(path)
+        proc = OptimizedImageProcessor(str(path))
+
+        with patch(
+            "src.services.image_processor._lanczos_resize", wraps=_lanczos_resize
+        ) as mock_resize:
+            proc.process(check_nsfw=False, max_pixels=512 * 512, min_size=256, max_size=2048)
+
+        # 1/4 DCT scaling hits the 512x512 target exactly, leaving nothing to resample
+        assert proc.image.size == (512, 512)
+        mock_resize.assert_not_called()
+
+    def test_rgba_composited_after_downscale(self):
+        """Alpha is flattened onto white at the final size, not at the source size."""
+        img = Image.new("RGBA", (4096, 4096), color=(0, 0, 255, 128))
+        proc = OptimizedImageProcessor(img)
+        composited_sizes = []
+        original_paste = Image.Image.paste
+
+        def record_paste(target, *args, **kwargs):
+            composited_sizes.append(target.size)
+            return original_paste(target, *args, **kwargs)
+
+        with patch.object(Image.Image, "paste", record_paste):
+            proc.process(check_nsfw=False, max_pixels=1024 * 1024, min_size=256, max_size=2048)
+
+        assert composited_sizes == [(1024, 1024)]
+        assert proc.image.mode == "RGB"
+        assert proc.image.getpixel((512, 512)) == pytest.approx((127, 127, 255), abs=2)
+
+    def test_palette_image_converted_before_resize(self):
+        """Palette images become RGB before resampling so LANCZOS is not downgraded."""
+        img = Image.new("P", (2048, 2048))
+        proc = OptimizedImageProcessor(img)
+
+        with patch(
+            "src.services.image_processor._lanczos_resize", wraps=_lanczos_resize
+        ) as mock_resize:
+            proc.process(check_nsfw=False, max_pixels=512 * 512, min_size=256, max_size=2048)
+
+        assert mock_resize.call_args[0][0].mode == "RGB"
+
+    def test_drafted_jpeg_keeps_final_size(self, tmp_path):
+        """Drafting never changes the output size computed from the source dimensions."""
+        path = tmp_path / "odd.jpg"
+        Image.new("RGB", (3001, 1999), color="blue").save(path)
+        expected = _compute_final_size((3001, 1999), 640 * 480, 256, 2048)
+        proc = OptimizedImageProcessor(str(path))
+
+        proc.process(check_nsfw=False, max_pixels=640 * 480, min_size=256, max_size=2048)
+
+        assert proc.image.size == expected
+
+    def test_large_shrink_box_reduces_before_lanczos(self):
+        """A 4x shrink is box-reduced 2x first, leaving LANCZOS a 2x step."""
+        img = Image.new("RGB", (2048, 2048), color="red")
+
+        reduce = Image.Image.reduce
+        with patch.object(
+            Image.Image, "reduce", autospec=True, side_effect=lambda im, f: reduce(im, f)
+        ) as spy:
+            result = _lanczos_resize(img, (512, 512))
+
+        spy.assert_called_once_with(img, 2)
+        assert result.size == (512, 512)
+        assert result.getpixel((256, 256)) == (255, 0, 0)
+
+    @pytest.mark.parametrize(("mode", "size"), [("RGBA", (512, 512)), ("RGB", (1024, 1024))])
+    def test_no_pre_reduce_for_alpha_or_small_shrinks(self, mode, size):
+        """Alpha images and shrinks under the gap go straight to LANCZOS."""
+        img = Image.new(mode, (2048, 2048))
+
+        with patch.object(Image.Image, "reduce") as spy:
+            _lanczos_resize(img, size)
+
+        spy.assert_not_called()
+
     def test_encode_returns_valid_base64(self):
         """Encode returns a decodable base64 string."""
         img = Image.new("RGB", (256, 256), color="red")
@@ -202,6 +346,30 @@ class TestOptimizedImageProcessor:
         result_img = Image.open(io.BytesIO(decoded))
         assert result_img.size == (256, 256)
 
+    def test_encode_opaque_image_as_jpeg(self):
+        """Opaque RGB sources are encoded as JPEG."""
+        proc = OptimizedImageProcessor(Image.new("RGB", (256, 256), color="red"))
+        result_img = Image.open(io.BytesIO(base64.b64decode(proc.encode())))
+        assert result_img.format == "JPEG"
+
+    def test_encode_mask_as_lossless_png(self):
+        """Masks survive encoding byte-exact as PNG even after RGB conversion."""
+        mask = Image.new("L", (256, 256), color=255)
+        mask.paste(0, (0, 0, 128, 256))
+        proc = OptimizedImageProcessor(mask)
+        proc._convert_color_mode()
+        result_img = Image.open(io.BytesIO(base64.b64decode(proc.encode())))
+        assert result_img.format == "PNG"
+        assert result_img.convert("L").getextrema() == (0, 255)
+        assert len(result_img.convert("L").getcolors()) == 2
+
+    def test_encode_alpha_source_as_png(self):
+        """RGBA sources are encoded as PNG."""
+        proc = OptimizedImageProcessor(Image.new("RGBA", (256, 256), color=(255, 0, 0, 128)))
+        proc._convert_color_mode()
+        result_img = Image.open(io.BytesIO(base64.b64decode(proc.encode())))
+        assert result_img.format == "PNG"
+
     def test_process_full_pipeline(self):
         """Process runs convert -> resize -> ensure -> encode."""
         img = Image.new("RGBA", (3000, 3000), color=(255, 0, 0, 128))
@@ -229,6 +397,76 @@ class TestOptimizedImageProcessor:
                 with pytest.raises(NSFWError):
                     proc.process(check_nsfw=True)
 
+    @pytest.fixture
+    def nsfw_enabled(self):
+        """Enable the NSFW check with a clean result cache."""
+        with (
+            patch("src.services.image_processor.get_config") as mock_get_config,
+            patch("src.services.image_processor._nsfw_cache", _NSFWCache()),
+        ):
+            mock_cfg = mock_get_config.return_value
+            mock_cfg.enable_nsfw_check = True
+            mock_cfg.max_pixels = 4194304
+            mock_cfg.min_image_size = 256
+            mock_cfg.max_image_size = 2048
+            yield
+
+    def test_process_overlaps_nsfw_check_with_encode(self, nsfw_enabled):
+        """The moderation request and the base64 encode run at the same time."""
+        proc = OptimizedImageProcessor(Image.new("RGB", (256, 256), color="red"))
+        barrier = threading.Barrier(2, timeout=5)
+        original_encode = proc.encode
+
+        def check(_payload):
+            barrier.wait()
+            return False
+
+        def encode():
+            barrier.wait()
+            return original_encode()
+
+        with (
+            patch.object(proc, "check_nsfw", side_effect=check),
+            patch.object(proc, "encode", side_effect=encode),
+        ):
+            result = proc.process(check_nsfw=True)
+
+        assert base64.b64decode(result)
+        assert not barrier.broken
+
+    def test_process_flagged_image_raises_and_is_cached(self, nsfw_enabled):
+        """A positive check discards the encode, raises, and is remembered."""
+        img = Image.new("RGB", (256, 256), color="red")
+        proc = OptimizedImageProcessor(img)
+
+        with (
+            patch.object(proc, "check_nsfw", return_value=True),
+            pytest.raises(NSFWError),
+        ):
+            proc.process(check_nsfw=True)
+
+        with (
+            patch.object(OptimizedImageProcessor, "check_nsfw") as mock_check,
+            pytest.raises(NSFWError),
+        ):
+            OptimizedImageProcessor(img.copy()).process(check_nsfw=True)
+        mock_check.assert_not_called()
+
+    def test_process_builds_nsfw_payload_once(self, nsfw_enabled):
+        """The cache lookup, the upload and the cache store share one payload encode."""
+        proc = OptimizedImageProcessor(Image.new("RGB", (256, 256), color="red"))
+
+        with (
+            patch(
+                "src.services.image_processor._nsfw_payload", wraps=_nsfw_payload
+            ) as mock_payload,
+            patch.object(proc, "check_nsfw", return_value=False) as mock_check,
+        ):
+            proc.process(check_nsfw=True)
+
+        mock_payload.assert_called_once()
+        assert mock_check.call_args[0][0] == _nsfw_payload(proc.image)
+
 
 class TestCheckNsfw:
     """Tests for synchronous NSFW check."""
@@ -267,7 +505,7 @@ class TestCheckNsfw:
 
         with (
             patch("src.services.image_processor.get_config") as mock_get_config,
-            patch("src.services.image_processor.urllib.request.urlopen") as mock_urlopen,
+            patch("src.services.image_processor._NSFW_HTTP") as mock_http,
         ):
             mock_cfg = mock_get_config.return_value
             mock_cfg.enable_nsfw_check = True
@@ -276,16 +514,21 @@ class TestCheckNsfw:
             mock_cfg.nsfw_timeout = 10
             mock_cfg.nsfw_max_retries = 1
 
-            mock_response = MagicMock()
-            mock_response.__enter__ = MagicMock(return_value=mock_response)
-            mock_response.__exit__ = MagicMock(return_value=False)
-            mock_response.read.return_value = response_data
-            mock_urlopen.return_value = mock_response
+            mock_http.request.return_value = MagicMock(status=200, data=response_data)
 
             result = proc.check_nsfw()
 
         assert result is True
 
+    @pytest.mark.parametrize("mode", ["RGB", "RGBA", "P"])
+    def test_nsfw_payload_is_jpeg_preview(self, mode):
+        """The moderation upload is a JPEG preview at the source size, whatever the mode."""
+        payload = _nsfw_payload(Image.new(mode, (64, 48)))
+
+        with Image.open(io.BytesIO(payload)) as preview:
+            assert preview.format == "JPEG"
+            assert preview.size == (64, 48)
+
     def test_nsfw_check_returns_false_on_safe_content(self):
         """NSFW check returns False when nsfw score < 0.5."""
         img = Image.new("RGB", (256, 256), color="red")
@@ -295,7 +538,7 @@ class TestCheckNsfw:
 
         with (
             patch("src.services.image_processor.get_config") as mock_get_config,
-            patch("src.services.image_processor.urllib.request.urlopen") as mock_urlopen,
+            patch("src.services.image_processor._NSFW_HTTP") as mock_http,
         ):
             mock_cfg = mock_get_config.return_value
             mock_cfg.enable_nsfw_check = True
@@ -304,16 +547,35 @@ class TestCheckNsfw:
             mock_cfg.nsfw_timeout = 10
             mock_cfg.nsfw_max_retries = 1
 
-            mock_response = MagicMock()
-            mock_response.__enter__ = MagicMock(return_value=mock_response)
-            mock_response.__exit__ = MagicMock(return_value=False)
-            mock_response.read.return_value = response_data
-            mock_urlopen.return_value = mock_response
+            mock_http.request.return_value = MagicMock(status=200, data=response_data)
 
             result = proc.check_nsfw()
 
         assert result is False
 
+    def test_nsfw_check_invalid_json_returns_none(self):
+        """A 200 response that is not JSON is retried, then reported as a failed check."""
+        proc = OptimizedImageProcessor(Image.new("RGB", (256, 256), color="red"))
+
+        with (
+            patch("src.services.image_processor.get_config") as mock_get_config,
+            patch("src.services.image_processor._NSFW_HTTP") as mock_http,
+            patch("src.services.image_processor.time.sleep"),
+        ):
+            mock_cfg = mock_get_config.return_value
+            mock_cfg.enable_nsfw_check = True
+            mock_cfg.hf_token = "test-token"
+            mock_cfg.nsfw_api_url = "https://example.com/nsfw"
+            mock_cfg.nsfw_timeout = 10
+            mock_cfg.nsfw_max_retries = 2
+
+            mock_http.request.return_value = MagicMock(status=200, data=b"<html>busy</html>")
+
+            result = proc.check_nsfw()
+
+        assert result is None
+        assert mock_http.request.call_count == 2
+
     def test_nsfw_check_503_retry(self):
         """NSFW check retries on 503 errors."""
         img = Image.new("RGB", (256, 256), color="red")
@@ -321,7 +583,7 @@ class TestCheckNsfw:
 
         with (
             patch("src.services.image_processor.get_config") as mock_get_config,
-            patch("src.services.image_processor.urllib.request.urlopen") as mock_urlopen,
+            patch("src.services.image_processor._NSFW_HTTP") as mock_http,
             patch("src.services.image_processor.time.sleep") as mock_sleep,
         ):
             mock_cfg = mock_get_config.return_value
@@ -332,26 +594,57 @@ class TestCheckNsfw:
             mock_cfg.nsfw_max_retries = 2
 
             # First call: 503, second: success
-            http_error = urllib.error.HTTPError(
-                "https://example.com/nsfw",
-                503,
-                "Service Unavailable",
-                {"Retry-After": "1"},
-                None,
+            unavailable = MagicMock(status=503, headers={"Retry-After": "1"})
+            success = MagicMock(
+                status=200, data=json.dumps([{"label": "nsfw", "score": 0.1}]).encode()
             )
-            success_response = MagicMock()
-            success_response.__enter__ = MagicMock(return_value=success_response)
-            success_response.__exit__ = MagicMock(return_value=False)
-            success_response.read.return_value = json.dumps(
-                [{"label": "nsfw", "score": 0.1}]
-            ).encode()
-
-            mock_urlopen.side_effect = [http_error, success_response]
+            mock_http.request.side_effect = [unavailable, success]
 
             result = proc.check_nsfw()
 
         assert result is False
         mock_sleep.assert_called_once_with(1)
+        # The payload is encoded once and the same bytes are re-sent on retry
+        bodies = [c.kwargs["body"] for c in mock_http.request.call_args_list]
+        assert len(bodies) == 2
+        assert bodies[0] is bodies[1]
+
+    def test_nsfw_check_client_error_not_retried(self):
+        """A 4xx response gives up immediately without sleeping."""
+        proc = OptimizedImageProcessor(Image.new("RGB", (256, 256), color="red"))
+
+        with (
+            patch("src.services.image_processor.get_config") as mock_get_config,
+            patch("src.services.image_processor._NSFW_HTTP") as mock_http,
+            patch("src.services.image_processor.time.sleep") as mock_sleep,
+        ):
+            mock_cfg = mock_get_config.return_value
+            mock_cfg.enable_nsfw_check = True
+            mock_cfg.hf_token = "test-token"
+            mock_cfg.nsfw_api_url = "https://example.com/nsfw"
+            mock_cfg.nsfw_timeout = 10
+            mock_cfg.nsfw_max_retries = 3
+            mock_http.request.return_value = MagicMock(status=401)
+
+            result = proc.check_nsfw()
+
+        assert result is None
+        mock_http.request.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_nsfw_http_pool_does_not_retry_on_its_own(self):
+        """The shared pool leaves retries to check_nsfw's loop and only follows redirects."""
+        retries = _NSFW_HTTP.connection_pool_kw["retries"]
+        assert (retries.connect, retries.read, retries.other) == (0, 0, 0)
+        assert retries.redirect == 3
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [(None, 5), ("7", 7), ("soon", 5), ("Wed, 21 Oct 2015 07:28:00 GMT", 0)],
+    )
+    def test_retry_after_parsing(self, header, expected):
+        """Retry-After accepts delay-seconds or an HTTP-date, defaulting to 5s."""
+        assert _retry_after_seconds(header) == expected
 
 
 class TestCreatePaddedImage:
@@ -401,10 +694,151 @@ class TestProcessCompositeToMask:
         assert result.mode == "L"
         assert result.size == (100, 100)
 
+    def test_composite_mask_marks_changed_pixels_black(self):
+        """Pixels differing in any channel, alpha included, are 0; untouched pixels are 255."""
+        original = Image.new("RGBA", (4, 2), color=(10, 20, 30, 255))
+        composite = original.copy()
+        composite.putpixel((0, 0), (10, 20, 31, 255))
+        composite.putpixel((3, 1), (10, 20, 30, 0))
+
+        mask = process_composite_to_mask(original, composite)
+
+        assert np.asarray(mask).ravel().tolist() == [0, 255, 255, 255, 255, 255, 255, 0]
+
+    def test_alpha_mask_marks_transparent_pixels_white(self):
+        """Without a composite, fully transparent pixels are 255 and the rest 0."""
+        img = Image.new("RGBA", (2, 1), color=(255, 0, 0, 255))
+        img.putpixel((1, 0), (255, 0, 0, 0))
+
+        assert np.asarray(process_composite_to_mask(img)).ravel().tolist() == [0, 255]
+
+    def test_rgba_inputs_are_not_converted(self):
+        """RGBA sources are read directly instead of being copied through convert."""
+        original = Image.new("RGBA", (2, 2), color=(1, 2, 3, 255))
+        composite = original.copy()
+
+        with patch.object(Image.Image, "convert", side_effect=AssertionError("convert called")):
+            mask = process_composite_to_mask(original, composite)
+
+        assert np.asarray(mask).ravel().tolist() == [255, 255, 255, 255]
+
+    def test_rgb_composite_is_converted_before_comparing(self):
+        """Non-RGBA composites are converted so opaque pixels compare equal."""
+        original = Image.new("RGBA", (1, 1), color=(1, 2, 3, 255))
+        composite = Image.new("RGB", (1, 1), color=(1, 2, 3))
+
+        assert np.asarray(process_composite_to_mask(original, composite)).tolist() == [[255]]
+
+    def test_transparent_mode_marks_non_white_pixels_opaque_black(self):
+        """transparent=True maps non-white pixels to opaque black and white ones to opaque white."""
+        img = Image.new("RGBA", (2, 1), color=(255, 255, 255, 0))
+        img.putpixel((1, 0), (255, 254, 255, 255))
+
+        result = np.asarray(process_composite_to_mask(img, transparent=True))
+
+        assert result.tolist() == [[[255, 255, 255, 255], [0, 0, 0, 255]]]
+
+
+class TestEncodeCache:
+    """Tests for the encoded-image LRU."""
+
+    def test_evicts_oldest_when_over_byte_budget(self):
+        """Total encoded size stays within max_bytes, dropping least recently used first."""
+        cache = _EncodeCache(max_size=10, max_bytes=10)
+        cache.put(b"a", "xxxx")
+        cache.put(b"b", "yyyy")
+        assert cache.get(b"a") == "xxxx"  # refresh a
+        cache.put(b"c", "zzzz")
+
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") == "xxxx"
+        assert cache.get(b"c") == "zzzz"
+
+    def test_oversized_entry_not_cached(self):
+        """An entry larger than the whole budget is skipped instead of flushing the cache."""
+        cache = _EncodeCache(max_size=10, max_bytes=10)
+        cache.put(b"a", "xxxx")
+        cache.put(b"big", "y" * 11)
+
+        assert cache.get(b"big") is None
+        assert cache.get(b"a") == "xxxx"
+
 
 class TestProcessAndEncodeImage:
     """Tests for process_and_encode_image convenience function."""
 
+    @pytest.fixture(autouse=True)
+    def clear_encode_cache(self):
+        """Start every test with an empty encode cache."""
+        _encode_cache.clear()
+        yield
+        _encode_cache.clear()
+
+    def test_same_file_encoded_once(self, tmp_path):
+        """Reopening an unchanged file reuses the earlier encoding."""
+        red, blue = tmp_path / "red.png", tmp_path / "blue.png"
+        Image.new("RGB", (256, 256), color="red").save(red)
+        Image.new("RGB", (256, 256), color="blue").save(blue)
+        with patch.object(OptimizedImageProcessor, "process", return_value="encoded") as mock:
+            first = process_and_encode_image(red)
+            second = process_and_encode_image(str(red))
+            process_and_encode_image(blue)
+            process_and_encode_image(red, max_pixels=1000)
+
+        assert first == second == "encoded"
+        assert mock.call_count == 3
+
+    def test_rewritten_file_encoded_again(self, tmp_path):
+        """A file replaced in place has a new stat and misses the cache."""
+        path = tmp_path / "upload.png"
+        Image.new("RGB", (256, 256), color="red").save(path)
+        with patch.object(OptimizedImageProcessor, "process", return_value="encoded") as mock:
+            process_and_encode_image(path)
+            Image.new("RGB", (300, 300), color="blue").save(path)
+            process_and_encode_image(path)
+
+        assert mock.call_count == 2
+
+    def test_unmoderated_result_not_cached(self, tmp_path):
+        """An encode whose NSFW check failed is redone, and cached once the check passes."""
+        path = tmp_path / "upload.png"
+        Image.new("RGB", (256, 256), color="red").save(path)
+        with (
+            patch("src.services.image_processor.get_config") as mock_get_config,
+            patch("src.services.image_processor._nsfw_cache", _NSFWCache()),
+            patch.object(
+                OptimizedImageProcessor, "check_nsfw", side_effect=[None, False]
+            ) as mock_check,
+        ):
+            mock_cfg = mock_get_config.return_value
+            mock_cfg.enable_nsfw_check = True
+            mock_cfg.max_pixels = 4194304
+            mock_cfg.min_image_size = 256
+            mock_cfg.max_image_size = 2048
+            results = [process_and_encode_image(path) for _ in range(3)]
+
+        assert results[0] == results[1] == results[2]
+        assert mock_check.call_count == 2
+
+    def test_pil_source_not_cached(self):
+        """Decoded images are not hashed, so they always encode."""
+        with patch.object(OptimizedImageProcessor, "process", return_value="encoded") as mock:
+            for _ in range(2):
+                process_and_encode_image(Image.new("RGB", (256, 256), color="red"))
+
+        assert mock.call_count == 2
+
+    def test_file_like_source_not_cached(self):
+        """Streams cannot be re-read for a fingerprint, so they always encode."""
+        buf = io.BytesIO()
+        Image.new("RGB", (256, 256)).save(buf, format="PNG")
+        with patch.object(OptimizedImageProcessor, "process", return_value="encoded") as mock:
+            for _ in range(2):
+                buf.seek(0)
+                process_and_encode_image(buf)
+
+        assert mock.call_count == 2
+
     def test_returns_base64_string(self):
         """Returns a valid base64 string."""
         img = Image.new("RGB", (512, 512), color="red")
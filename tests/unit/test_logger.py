@@ -2,8 +2,11 @@
 
 import logging
 import re
+from unittest.mock import patch
 
-from src.utils.logger import OptimizedLogger
+import pytest
+
+from src.utils.logger import OptimizedLogger, log_performance
 
 
 class TestLoggerRequestId:
@@ -63,3 +66,80 @@ class TestLoggerLevelValidation:
 
         for level in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"):
             assert f"{level} message" in caplog.text
+
+    def test_level_lookup_does_not_copy_logging_mapping(self, caplog):
+        """Levels resolve from the precomputed table, lower case included."""
+        logger = OptimizedLogger()
+        with (
+            patch("logging.getLevelNamesMapping") as mock_mapping,
+            caplog.at_level(logging.WARNING),
+        ):
+            logger.log("lower-case level", level="warning")
+
+        mock_mapping.assert_not_called()
+        assert caplog.records[-1].levelno == logging.WARNING
+
+
+class TestLoggerLazyFormatting:
+    """Tests for deferred formatting and level gating."""
+
+    def test_args_are_interpolated(self, caplog):
+        """Positional args are %-formatted into the message."""
+        logger = OptimizedLogger()
+        with caplog.at_level(logging.INFO):
+            logger.info("decoded %d bytes for %s", 42, "img", request_id="r1")
+
+        assert "[r1] decoded 42 bytes for img" in caplog.text
+
+    def test_disabled_level_skips_formatting(self, caplog):
+        """A record no sink wants is dropped before its args are formatted."""
+
+        class Exploding:
+            def __str__(self) -> str:
+                raise AssertionError("formatted a disabled record")
+
+        logger = OptimizedLogger()
+        with caplog.at_level(logging.WARNING):
+            logger.debug("value: %s", Exploding())
+
+        assert caplog.text == ""
+
+    def test_cloudwatch_batch_honors_log_level(self):
+        """In Lambda, records below LOG_LEVEL are not batched for CloudWatch."""
+        with patch.dict("os.environ", {"LOG_LEVEL": "INFO", "AWS_LAMBDA_FUNCTION_NAME": "fn"}):
+            logger = OptimizedLogger()
+            logger._cloudwatch_client = object()
+            logger.debug("not shipped")
+            logger.info("shipped")
+
+        assert len(logger.batch_logs) == 1
+        assert logger.batch_logs[0]["message"].endswith("] shipped")
+
+
+class TestLogPerformance:
+    """Tests for the log_performance decorator."""
+
+    def test_logs_completion_with_qualified_name(self, caplog):
+        """Successful calls log the module-qualified function name and duration."""
+
+        @log_performance
+        def work() -> int:
+            return 7
+
+        with caplog.at_level(logging.INFO):
+            assert work() == 7
+
+        assert re.search(rf"Completed {__name__}\.work in \d+\.\d\ds", caplog.text)
+
+    def test_logs_failure_and_reraises(self, caplog):
+        """Failures are logged with the error and re-raised unchanged."""
+
+        @log_performance
+        def broken() -> None:
+            raise RuntimeError("boom")
+
+        with caplog.at_level(logging.ERROR), pytest.raises(RuntimeError, match="boom"):
+            broken()
+
+        assert f"Failed {__name__}.broken after" in caplog.text
+        assert caplog.text.rstrip().endswith("boom")
@@ -231,6 +231,90 @@ class TestRateLimitExceeded:
         ):
             rl.check_rate_limit(body)
 
+    def test_batch_request_costs_per_image(self, limiter_with_mock):
+        """16 standard + a 5-image standard batch = 21 > 20, exceeds limit."""
+        rl, mock_cm = limiter_with_mock
+        now = time.time()
+        rate_data = {"premium": [], "standard": [now - i for i in range(16)]}
+
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: json.dumps(rate_data).encode())
+        }
+
+        body = json.dumps({"imageGenerationConfig": {"quality": "standard", "numberOfImages": 5}})
+
+        with (
+            patch(
+                "src.services.rate_limiter.get_config",
+                return_value=_mock_get_config(),
+            ),
+            pytest.raises(RateLimitError),
+        ):
+            rl.check_rate_limit(body)
+
+    def test_batch_request_records_each_image(self, limiter_with_mock):
+        """An allowed batch records one timestamp per generated image."""
+        rl, mock_cm = limiter_with_mock
+        rate_data = {"premium": [], "standard": []}
+
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: json.dumps(rate_data).encode())
+        }
+
+        body = json.dumps({"imageGenerationConfig": {"quality": "premium", "numberOfImages": 3}})
+
+        with patch(
+            "src.services.rate_limiter.get_config",
+            return_value=_mock_get_config(),
+        ):
+            rl.check_rate_limit(body)
+
+        stored = json.loads(mock_cm.s3_client.put_object.call_args.kwargs["Body"])
+        assert len(stored["premium"]) == 3
+
+    def test_rejection_reuses_last_snapshot(self, limiter_with_mock):
+        """Once S3 shows the limit is reached, later requests are rejected without S3 reads."""
+        rl, mock_cm = limiter_with_mock
+        now = time.time()
+        rate_data = {"premium": [], "standard": [now - i for i in range(20)]}
+
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: json.dumps(rate_data).encode())
+        }
+
+        body = json.dumps({"imageGenerationConfig": {"quality": "standard"}})
+
+        with patch(
+            "src.services.rate_limiter.get_config",
+            return_value=_mock_get_config(),
+        ):
+            for _ in range(3):
+                with pytest.raises(RateLimitError):
+                    rl.check_rate_limit(body)
+
+        assert mock_cm.s3_client.get_object.call_count == 1
+
+    def test_expired_snapshot_entries_fall_through_to_s3(self, limiter_with_mock):
+        """A snapshot whose entries have aged out no longer blocks requests."""
+        rl, mock_cm = limiter_with_mock
+        old = time.time() - rl.WINDOW_SIZE_SECONDS - 1
+        rl._remember({"premium": [], "standard": [old] * 20})
+
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: json.dumps({"premium": [], "standard": []}).encode())
+        }
+
+        body = json.dumps({"imageGenerationConfig": {"quality": "standard"}})
+
+        with patch(
+            "src.services.rate_limiter.get_config",
+            return_value=_mock_get_config(),
+        ):
+            rl.check_rate_limit(body)
+
+        mock_cm.s3_client.get_object.assert_called_once()
+        mock_cm.s3_client.put_object.assert_called_once()
+
     def test_fail_open_on_generic_client_error(self, limiter_with_mock):
         """Non-NoSuchKey ClientError allows request (fail open)."""
         rl, mock_cm = limiter_with_mock
@@ -321,6 +405,49 @@ class TestETagOptimisticLocking:
 
         assert mock_cm.s3_client.put_object.call_count == 2
 
+    def test_write_after_own_write_skips_get(self, limiter_with_mock):
+        """A follow-up request PUTs against the ETag of the previous write without a GET."""
+        rl, mock_cm = limiter_with_mock
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: b'{"premium": [], "standard": []}'),
+            "ETag": '"etag-1"',
+        }
+        mock_cm.s3_client.put_object.side_effect = [{"ETag": '"etag-2"'}, {"ETag": '"etag-3"'}]
+        body = json.dumps({"imageGenerationConfig": {"quality": "standard"}})
+
+        with patch("src.services.rate_limiter.get_config", return_value=_mock_get_config()):
+            rl.check_rate_limit(body)
+            rl.check_rate_limit(body)
+
+        mock_cm.s3_client.get_object.assert_called_once()
+        second_put = mock_cm.s3_client.put_object.call_args_list[1].kwargs
+        assert second_put["IfMatch"] == '"etag-2"'
+        assert len(json.loads(second_put["Body"])["standard"]) == 2
+
+    def test_stale_snapshot_etag_falls_back_to_get(self, limiter_with_mock):
+        """If another instance wrote since, the conditional PUT fails and S3 is re-read."""
+        rl, mock_cm = limiter_with_mock
+        rl._remember({"premium": [], "standard": []}, '"stale"')
+        now = time.time()
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: json.dumps({"premium": [now], "standard": []}).encode()),
+            "ETag": '"fresh"',
+        }
+        mock_cm.s3_client.put_object.side_effect = [
+            ClientError({"Error": {"Code": "PreconditionFailed", "Message": ""}}, "PutObject"),
+            {"ETag": '"after"'},
+        ]
+        body = json.dumps({"imageGenerationConfig": {"quality": "standard"}})
+
+        with patch("src.services.rate_limiter.get_config", return_value=_mock_get_config()):
+            rl.check_rate_limit(body)
+
+        puts = mock_cm.s3_client.put_object.call_args_list
+        assert [c.kwargs["IfMatch"] for c in puts] == ['"stale"', '"fresh"']
+        # The retried write builds on the other instance's entry instead of dropping it
+        assert len(json.loads(puts[1].kwargs["Body"])["premium"]) == 1
+        assert rl._snapshot_etag == '"after"'
+
     def test_precondition_failed_exhausts_retries_fails_open(self, limiter_with_mock):
         """PreconditionFailed on all retries allows request (fail open)."""
         rl, mock_cm = limiter_with_mock
@@ -346,6 +473,27 @@ class TestETagOptimisticLocking:
             # Should not raise (fail open after exhausting retries)
             rl.check_rate_limit(body)
 
+    def test_stale_snapshot_does_not_consume_a_retry(self, limiter_with_mock):
+        """A stale snapshot write is extra: three S3-read attempts still follow it."""
+        rl, mock_cm = limiter_with_mock
+        rl._remember({"premium": [], "standard": []}, '"stale"')
+        mock_cm.s3_client.get_object.return_value = {
+            "Body": MagicMock(read=lambda: b'{"premium": [], "standard": []}'),
+            "ETag": '"fresh"',
+        }
+        conflict = ClientError(
+            {"Error": {"Code": "PreconditionFailed", "Message": ""}}, "PutObject"
+        )
+        mock_cm.s3_client.put_object.side_effect = [conflict, conflict, conflict, {"ETag": '"ok"'}]
+        body = json.dumps({"imageGenerationConfig": {"quality": "standard"}})
+
+        with patch("src.services.rate_limiter.get_config", return_value=_mock_get_config()):
+            rl.check_rate_limit(body)
+
+        assert mock_cm.s3_client.put_object.call_count == 4
+        assert mock_cm.s3_client.get_object.call_count == 3
+        assert rl._snapshot_etag == '"ok"'
+
     def test_get_rate_data_returns_etag(self, limiter_with_mock):
         """_get_rate_data returns (data, etag) tuple."""
         rl, mock_cm = limiter_with_mock
@@ -90,6 +90,13 @@ class TestValidateHexColors:
         with pytest.raises(ValidationError, match="Invalid hex color format"):
             validate_hex_colors("#ff5733,invalid,#3357ff")
 
+    def test_repeated_input_returns_independent_lists(self):
+        """Memoized parsing still hands each caller its own list."""
+        first = validate_hex_colors("#ff5733,#3357ff")
+        first.append("#000000")
+
+        assert validate_hex_colors("#ff5733,#3357ff") == ["#FF5733", "#3357FF"]
+
 
 class TestValidatePrompt:
     """Tests for validate_prompt function."""
@@ -197,6 +204,10 @@ class TestDefaultColors:
         """Test default colors has 10 entries."""
         assert len(DEFAULT_COLORS) == 10
 
+    def test_default_colors_are_immutable(self):
+        """The shared palette is a tuple so no request can mutate it."""
+        assert isinstance(DEFAULT_COLORS, tuple)
+
     def test_default_colors_are_valid(self):
         """Test all default colors are valid hex colors."""
         for color in DEFAULT_COLORS: